@@ -0,0 +1,209 @@
+"""Manifest-based incremental sync of TLC source files into a GCS bucket.
+
+A manifest blob next to the synced objects (<prefix>.sync_manifest.json)
+records, per object, the source URL, its size and ETag at transfer time,
+and the crc32c of what was uploaded. A sync run then only needs a HEAD per
+source and one bucket listing to decide what to do:
+
+- source unchanged (size + ETag) and the bucket object still has the
+  recorded crc32c -> skip
+- new or changed source, or bucket object missing/modified -> transfer
+- source gone (404, or 403 from CloudFront) or dropped from the source
+  list -> delete the object
+- HEAD failed for another reason -> leave the object and its manifest
+  entry alone until a later run can tell
+
+The crc32c is computed while streaming, and the upload is verified against
+it by the storage client, so no separate existence check is needed.
+"""
+
+import base64
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import google_crc32c
+from google.api_core.exceptions import NotFound
+
+import tlc_cache
+
+MANIFEST_NAME = ".sync_manifest.json"
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MB, multiple of 256 KB as GCS requires
+HEAD_WORKERS = 16
+
+
+class _HeadRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Follow redirects with HEAD; the stock handler re-issues them as GET."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        new = super().redirect_request(req, fp, code, msg, headers, newurl)
+        if new is not None and req.get_method() == "HEAD":
+            new.method = "HEAD"
+        return new
+
+
+_head_opener = urllib.request.build_opener(_HeadRedirectHandler)
+
+
+def _gone(url, code):
+    # CloudFront in front of S3 answers 403 AccessDenied for a missing key
+    return code == 404 or (code == 403 and (urlparse(url).hostname or "").endswith(".cloudfront.net"))
+
+
+def head(url, timeout=30):
+    """Size and ETag of a source file, or None if it no longer exists.
+
+    Any other failure comes back as {"error": reason}, so one unreachable
+    source does not stop the HEADs of the others.
+    """
+    req = urllib.request.Request(url, method="HEAD")
+    try:
+        with _head_opener.open(req, timeout=timeout) as resp:
+            size = resp.headers.get("Content-Length")
+            return {
+                "size": int(size) if size is not None else None,
+                "etag": resp.headers.get("ETag") or resp.headers.get("Last-Modified"),
+            }
+    except urllib.error.HTTPError as e:
+        if _gone(url, e.code):
+            return None
+        return {"error": f"HTTP {e.code}"}
+    except OSError as e:
+        # URLError, timeouts and connection resets
+        return {"error": f"{type(e).__name__}: {e}"}
+
+
+def stream_to_blob(blob, url, content_type=None):
+    """Stream `url` (through the download cache) into a resumable upload of `blob`.
+
+    Returns (size, crc32c) with the crc32c base64-encoded the way GCS reports it.
+    The storage client also checks the crc32c against the server's at the end
+    of the upload and raises if they differ.
+    """
+    checksum = google_crc32c.Checksum()
+    size = 0
+
+    blob.chunk_size = blob.chunk_size or UPLOAD_CHUNK_SIZE
+    writer = blob.open("wb", content_type=content_type, checksum="crc32c")
+
+    def on_chunk(chunk):
+        nonlocal size
+        checksum.update(chunk)
+        size += len(chunk)
+        writer.write(chunk)
+
+    # On failure the writer is left open, so the resumable session never
+    # finalizes and no partial object is created
+    tlc_cache.fetch(url, on_chunk=on_chunk)
+    writer.close()
+    return size, base64.b64encode(checksum.digest()).decode("ascii")
+
+
+def load_manifest(bucket, prefix=""):
+    try:
+        return json.loads(bucket.blob(prefix + MANIFEST_NAME).download_as_bytes())
+    except NotFound:
+        return {}
+
+
+def save_manifest(bucket, manifest, prefix=""):
+    bucket.blob(prefix + MANIFEST_NAME).upload_from_string(
+        json.dumps(manifest, indent=1, sort_keys=True), content_type="application/json"
+    )
+
+
+def sync(bucket, sources, transfer, prefix="", concurrency=8):
+    """Bring the objects under `prefix` in line with `sources` ({blob_name: url}).
+
+    `transfer(blob_name, url)` uploads one object and returns its crc32c
+    (base64), or None if the transfer failed. Returns a summary dict.
+    """
+    with ThreadPoolExecutor(max_workers=HEAD_WORKERS) as executor:
+        heads = dict(zip(sources, executor.map(head, sources.values())))
+
+    listing = {
+        blob.name: blob.crc32c
+        for blob in bucket.list_blobs(prefix=prefix)
+        if blob.name != prefix + MANIFEST_NAME
+    }
+    manifest = load_manifest(bucket, prefix)
+    manifest_before = json.dumps(manifest, sort_keys=True)
+
+    to_transfer = []
+    to_delete = []
+    gone = []
+    unknown = []
+    for blob_name, url in sources.items():
+        source = heads[blob_name]
+        entry = manifest.get(blob_name)
+        if source is not None and "error" in source:
+            print(f"  {blob_name}: source unknown this run ({source['error']}), left as is")
+            unknown.append(blob_name)
+            continue
+        if source is None:
+            print(f"  {blob_name}: source gone ({url})")
+            gone.append(blob_name)
+            if blob_name in listing:
+                to_delete.append(blob_name)
+            continue
+        unchanged = (
+            entry is not None
+            and entry["url"] == url
+            and entry["source_size"] == source["size"]
+            and entry["source_etag"] == source["etag"]
+            and listing.get(blob_name) == entry["crc32c"]
+        )
+        if not unchanged:
+            to_transfer.append(blob_name)
+
+    # Objects this sync put there earlier whose source was dropped from the list
+    to_delete += [name for name in manifest if name not in sources and name in listing]
+
+    unchanged = len(sources) - len(to_transfer) - len(gone) - len(unknown)
+    print(f"Sync gs://{bucket.name}/{prefix}: {len(to_transfer)} to transfer, "
+          f"{len(to_delete)} to delete, {unchanged} unchanged, {len(unknown)} unknown")
+
+    lock = threading.Lock()
+    failed = []
+
+    def run(blob_name):
+        try:
+            crc32c = transfer(blob_name, sources[blob_name])
+        except Exception as e:
+            print(f"  FAILED {blob_name}: {e}")
+            crc32c = None
+        with lock:
+            if crc32c is None:
+                failed.append(blob_name)
+                manifest.pop(blob_name, None)
+                return
+            manifest[blob_name] = {
+                "url": sources[blob_name],
+                "source_size": heads[blob_name]["size"],
+                "source_etag": heads[blob_name]["etag"],
+                "crc32c": crc32c,
+            }
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(run, to_transfer))
+
+        for blob_name in to_delete:
+            bucket.blob(blob_name).delete()
+            manifest.pop(blob_name, None)
+            print(f"  Deleted gs://{bucket.name}/{blob_name}")
+    finally:
+        # Record whatever finished, so an interrupted run does not redo it
+        if json.dumps(manifest, sort_keys=True) != manifest_before:
+            save_manifest(bucket, manifest, prefix)
+
+    return {
+        "transferred": len(to_transfer) - len(failed),
+        "failed": failed,
+        "deleted": len(to_delete),
+        "unchanged": unchanged,
+        "unknown": unknown,
+    }
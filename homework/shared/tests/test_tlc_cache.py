@@ -0,0 +1,233 @@
+"""Tests for tlc_cache against a local HTTP server.
+
+The server serves one file with an ETag and Last-Modified, and answers
+conditional and Range requests the way CloudFront does. It records every
+request, so the tests can check what the cache asked for as well as what
+it returned. Standard library only, like tlc_cache itself:
+
+    python -m unittest discover homework/shared/tests
+"""
+
+import hashlib
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import tlc_cache
+
+BODY = bytes(range(256)) * 64  # 16 KB
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Oct 2025 00:00:00 GMT"
+
+
+class SourceHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        source = self.server.source
+        time.sleep(source["delay"])
+        body, etag, last_modified = source["body"], source["etag"], source["last_modified"]
+        validators = {etag, last_modified} - {None}
+
+        if etag and self.headers.get("If-None-Match") == etag or \
+                not etag and self.headers.get("If-Modified-Since") == last_modified:
+            return self._respond(304, b"")
+
+        start = 0
+        if self.headers.get("Range") and self.headers.get("If-Range") in validators:
+            start = int(self.headers["Range"].removeprefix("bytes=").rstrip("-"))
+            if start >= len(body):
+                return self._respond(416, b"", {"Content-Range": f"bytes */{len(body)}"})
+        status = 206 if start else 200
+        extra = {"Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"} if start else {}
+        self._respond(status, body[start:], extra, send=source["truncate_at"])
+
+    def _respond(self, status, body, extra=None, send=None):
+        source = self.server.source
+        source["requests"].append((status, dict(self.headers)))
+        self.send_response(status)
+        for name, value in [("ETag", source["etag"]), ("Last-Modified", source["last_modified"])]:
+            if value:
+                self.send_header(name, value)
+        for name, value in (extra or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        # send < len(body) drops the connection mid-body, like a reset transfer
+        self.wfile.write(body[:send])
+
+    def log_message(self, *args):
+        pass
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), SourceHandler)
+        self.server.source = {
+            "body": BODY, "etag": ETAG, "last_modified": LAST_MODIFIED,
+            "delay": 0, "truncate_at": None, "requests": [],
+        }
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/yellow_tripdata_2025-11.parquet"
+
+        self.root = tempfile.mkdtemp(prefix="tlc_cache_test_")
+        self.cache = tlc_cache.DownloadCache(root=self.root, timeout=5)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.root)
+
+    @property
+    def source(self):
+        return self.server.source
+
+    def statuses(self):
+        return [status for status, _ in self.source["requests"]]
+
+    def write_partial(self, data, validator):
+        key = tlc_cache._url_key(self.url)
+        (self.cache.partial / key).write_bytes(data)
+        (self.cache.partial / f"{key}.json").write_text(json.dumps({"url": self.url, "validator": validator}))
+
+
+class RevalidationTest(CacheTestCase):
+    def test_etag_revalidation_reuses_the_cached_file(self):
+        first = self.cache.fetch(self.url)
+        second = self.cache.fetch(self.url)
+
+        self.assertEqual(first, second)
+        self.assertEqual(second.read_bytes(), BODY)
+        self.assertEqual(second.suffix, ".parquet")
+        self.assertEqual(self.statuses(), [200, 304])
+        self.assertEqual(self.source["requests"][1][1].get("If-None-Match"), ETAG)
+
+    def test_last_modified_revalidation_without_etag(self):
+        self.source["etag"] = None
+        self.cache.fetch(self.url)
+        self.cache.fetch(self.url)
+
+        self.assertEqual(self.statuses(), [200, 304])
+        self.assertEqual(self.source["requests"][1][1].get("If-Modified-Since"), LAST_MODIFIED)
+
+    def test_max_age_skips_the_server(self):
+        self.cache.fetch(self.url)
+        self.cache.fetch(self.url, max_age=3600)
+        self.assertEqual(self.statuses(), [200])
+
+    def test_changed_source_replaces_the_cached_file(self):
+        old = self.cache.fetch(self.url)
+        self.source.update(body=BODY[::-1], etag='"v2"')
+        new = self.cache.fetch(self.url)
+
+        self.assertEqual(new.read_bytes(), BODY[::-1])
+        self.assertFalse(old.exists())
+
+    def test_on_chunk_streams_the_whole_body(self):
+        chunks = []
+        self.cache.fetch(self.url, on_chunk=chunks.append)
+        self.cache.fetch(self.url, on_chunk=chunks.append)
+        self.assertEqual(b"".join(chunks), BODY * 2)
+
+
+class ResumeTest(CacheTestCase):
+    def test_resumes_a_truncated_partial_with_range(self):
+        self.write_partial(BODY[:5000], ETAG)
+        path = self.cache.fetch(self.url)
+
+        self.assertEqual(path.read_bytes(), BODY)
+        self.assertEqual(path.stem, hashlib.sha256(BODY).hexdigest())
+        status, headers = self.source["requests"][0]
+        self.assertEqual(status, 206)
+        self.assertEqual(headers.get("Range"), "bytes=5000-")
+        self.assertEqual(headers.get("If-Range"), ETAG)
+
+    def test_changed_source_restarts_instead_of_resuming(self):
+        self.write_partial(BODY[:5000], '"v0"')
+        path = self.cache.fetch(self.url)
+
+        self.assertEqual(self.statuses(), [200])
+        self.assertEqual(path.read_bytes(), BODY)
+
+    def test_416_discards_the_partial_and_starts_over(self):
+        self.write_partial(BODY, ETAG)
+        path = self.cache.fetch(self.url)
+
+        self.assertEqual(self.statuses(), [416, 200])
+        self.assertEqual(path.read_bytes(), BODY)
+
+    def test_incomplete_download_is_rejected_and_resumed_later(self):
+        self.source["truncate_at"] = 6000
+        with self.assertRaises(OSError):
+            self.cache.fetch(self.url)
+        self.assertEqual(self.cache._read_index(), {})
+        self.assertEqual(list(self.cache.objects.rglob("*.parquet")), [])
+
+        self.source["truncate_at"] = None
+        path = self.cache.fetch(self.url)
+
+        self.assertEqual(path.read_bytes(), BODY)
+        self.assertEqual(self.source["requests"][1][1].get("Range"), "bytes=6000-")
+
+
+class EvictionTest(CacheTestCase):
+    def test_least_recently_used_file_is_evicted_past_the_cap(self):
+        self.cache.max_bytes = 2 * len(BODY)
+        base = self.url.rsplit("/", 1)[0]
+        urls = [f"{base}/{name}.parquet" for name in "abc"]
+
+        # Each URL gets different content, so none share an object
+        paths = {}
+        for i, url in enumerate(urls[:2]):
+            self.source["body"] = BODY[i:] + BODY[:i]
+            paths[url] = self.cache.fetch(url)
+        self.cache.fetch(urls[0], max_age=3600)  # a is now more recent than b
+        self.source["body"] = BODY[2:] + BODY[:2]
+        paths[urls[2]] = self.cache.fetch(urls[2])
+
+        index = self.cache._read_index()
+        self.assertEqual(sorted(index), sorted([urls[0], urls[2]]))
+        self.assertFalse(paths[urls[1]].exists())
+        self.assertTrue(paths[urls[0]].exists() and paths[urls[2]].exists())
+
+
+class ConcurrencyTest(CacheTestCase):
+    def test_concurrent_fetches_download_once(self):
+        self.source["delay"] = 0.3
+        results = []
+
+        def fetch():
+            results.append(self.cache.fetch(self.url))
+
+        threads = [threading.Thread(target=fetch) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(results[0].read_bytes(), BODY)
+        self.assertEqual(self.statuses().count(200), 1)
+
+    def test_separate_cache_instances_share_the_lock(self):
+        # Two DownloadCache objects on one root behave like two processes
+        self.source["delay"] = 0.3
+        other = tlc_cache.DownloadCache(root=self.root, timeout=5)
+        threads = [threading.Thread(target=cache.fetch, args=(self.url,)) for cache in (self.cache, other)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(self.statuses().count(200), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
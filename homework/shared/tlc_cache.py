@@ -0,0 +1,301 @@
+"""Shared, content-addressed download cache for NYC TLC trip files.
+
+Every week fetches the same CloudFront / GitHub release files. Instead of
+downloading them again each run, scripts call `fetch(url)` and get back a
+local path:
+
+    import tlc_cache
+    path = tlc_cache.fetch("https://d37ci6vzurychx.cloudfront.net/trip-data/green_tripdata_2025-10.parquet")
+
+Layout under the cache root (TLC_CACHE_DIR, default ~/.cache/tlc):
+
+    objects/ab/<sha256><suffix>   file bodies, stored once per content hash
+    partial/<url key>             interrupted downloads, resumed with Range requests
+    locks/<url key>.lock          one downloader per URL across threads and processes
+    index.json                    url -> sha256, size, ETag/Last-Modified, last access
+
+Cached files are revalidated with If-None-Match / If-Modified-Since, and the
+least recently used ones are evicted once the cache grows past
+TLC_CACHE_MAX_BYTES (default 20 GB). Only the standard library is used so
+every week's project can import it without extra dependencies.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path, PurePosixPath
+from urllib.parse import urlparse
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+CACHE_DIR = Path(os.environ.get("TLC_CACHE_DIR", Path.home() / ".cache" / "tlc"))
+MAX_BYTES = int(os.environ.get("TLC_CACHE_MAX_BYTES", 20 * 1024 ** 3))
+CHUNK_SIZE = 8 * 1024 * 1024  # 8 MB
+TIMEOUT = 60
+
+
+class FileLock:
+    """Exclusive lock on a file, shared by threads and processes on this machine."""
+
+    _thread_locks = {}
+    _guard = threading.Lock()
+
+    def __init__(self, path):
+        self.path = Path(path)
+        # flock is per open file, so threads of one process also need a plain lock
+        with FileLock._guard:
+            self._thread_lock = FileLock._thread_locks.setdefault(str(self.path), threading.Lock())
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.path, "a+b")
+        if fcntl:
+            fcntl.flock(self._fh, fcntl.LOCK_EX)
+        else:
+            self._fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self._fh, fcntl.LOCK_UN)
+        else:
+            self._fh.seek(0)
+            msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+        self._fh.close()
+        self._thread_lock.release()
+
+
+def _url_key(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _suffix(url):
+    """Keep the file extension (.parquet, .csv.gz) so readers can infer the format."""
+    return "".join(PurePosixPath(urlparse(url).path).suffixes)
+
+
+class DownloadCache:
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_BYTES, timeout=TIMEOUT):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.objects = self.root / "objects"
+        self.partial = self.root / "partial"
+        self.locks = self.root / "locks"
+        self.index_path = self.root / "index.json"
+        for d in (self.objects, self.partial, self.locks):
+            d.mkdir(parents=True, exist_ok=True)
+
+    # ---------------------------------------------------------
+    # Index
+    # ---------------------------------------------------------
+
+    def _read_index(self):
+        if self.index_path.exists():
+            return json.loads(self.index_path.read_text())
+        return {}
+
+    def _update_index(self, update):
+        """Apply update(index) under the index lock and write the index back atomically."""
+        with FileLock(self.locks / "index.lock"):
+            index = self._read_index()
+            result = update(index)
+            tmp = self.index_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(index, indent=1))
+            os.replace(tmp, self.index_path)
+            return result
+
+    def object_path(self, entry):
+        return self.objects / entry["sha256"][:2] / (entry["sha256"] + entry["suffix"])
+
+    def _touch(self, url, **fields):
+        def update(index):
+            index[url].update(fields, accessed=time.time())
+        self._update_index(update)
+
+    def _evict(self, index, keep_url):
+        """Drop least recently used entries until the referenced objects fit in max_bytes."""
+        sizes = {entry["sha256"]: entry["size"] for entry in index.values()}
+        total = sum(sizes.values())
+        for url, entry in sorted(index.items(), key=lambda item: item[1]["accessed"]):
+            if total <= self.max_bytes:
+                break
+            if url == keep_url:
+                continue
+            del index[url]
+            # Another URL may still point at the same content
+            if not any(e["sha256"] == entry["sha256"] for e in index.values()):
+                self.object_path(entry).unlink(missing_ok=True)
+                total -= sizes[entry["sha256"]]
+                print(f"Evicted {url} from cache ({entry['size'] / 1024 / 1024:.1f} MB)")
+
+    # ---------------------------------------------------------
+    # Download
+    # ---------------------------------------------------------
+
+    @staticmethod
+    def _replay(path, on_chunk):
+        if on_chunk is not None:
+            with open(path, "rb") as f:
+                while chunk := f.read(CHUNK_SIZE):
+                    on_chunk(chunk)
+
+    def fetch(self, url, max_age=0, on_chunk=None):
+        """Return a local path for `url`, downloading or revalidating as needed.
+
+        A cached copy validated less than `max_age` seconds ago is returned
+        without contacting the server. If revalidation fails (network error,
+        source gone) an existing cached copy is still returned.
+
+        If `on_chunk` is given, the whole file body is also passed to it in
+        order, CHUNK_SIZE bytes at a time, as it is downloaded (or read back
+        from the cache), so callers can stream it onwards without holding it
+        in memory.
+        """
+        key = _url_key(url)
+        delivered = False
+
+        def deliver(chunk):
+            nonlocal delivered
+            delivered = True
+            on_chunk(chunk)
+
+        with FileLock(self.locks / f"{key}.lock"):
+            entry = self._read_index().get(url)
+            cached = self.object_path(entry) if entry else None
+            if cached is not None and not cached.exists():
+                entry = cached = None
+
+            if cached is not None and time.time() - entry["validated"] < max_age:
+                self._touch(url)
+                self._replay(cached, on_chunk)
+                return cached
+
+            try:
+                return self._download(url, key, entry, deliver if on_chunk else None)
+            except (urllib.error.URLError, OSError) as e:
+                # Half of a new version already went to on_chunk; the old copy can't follow it
+                if cached is None or delivered:
+                    raise
+                print(f"Could not revalidate {url} ({e}), using cached copy")
+                self._touch(url)
+                self._replay(cached, on_chunk)
+                return cached
+
+    def _download(self, url, key, entry, on_chunk=None):
+        partial = self.partial / key
+        meta_path = self.partial / f"{key}.json"
+
+        headers = {}
+        offset = 0
+        if partial.exists() and meta_path.exists():
+            # Resume only if the server still serves the same version (If-Range)
+            validator = json.loads(meta_path.read_text()).get("validator")
+            if validator:
+                offset = partial.stat().st_size
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = validator
+        elif entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            resp = urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                self._touch(url, validated=time.time())
+                self._replay(self.object_path(entry), on_chunk)
+                return self.object_path(entry)
+            if e.code == 416:
+                # Partial file is stale or already complete; start over
+                partial.unlink(missing_ok=True)
+                meta_path.unlink(missing_ok=True)
+                return self._download(url, key, entry, on_chunk)
+            raise
+
+        with resp:
+            if resp.status != 206:
+                offset = 0
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+            meta_path.write_text(json.dumps({"url": url, "validator": etag or last_modified}))
+
+            digest = hashlib.sha256()
+            if offset:
+                print(f"Resuming {url} at {offset / 1024 / 1024:.1f} MB")
+                with open(partial, "rb") as f:
+                    while chunk := f.read(CHUNK_SIZE):
+                        digest.update(chunk)
+                        if on_chunk is not None:
+                            on_chunk(chunk)
+            else:
+                print(f"Downloading {url}...")
+
+            length = resp.headers.get("Content-Length")
+            with open(partial, "ab" if offset else "wb") as f:
+                while chunk := resp.read(CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    if on_chunk is not None:
+                        on_chunk(chunk)
+
+        # A dropped connection just ends the body early; keep the partial for the next resume
+        if length is not None and partial.stat().st_size != offset + int(length):
+            raise OSError(f"Incomplete download of {url}: got {partial.stat().st_size} of "
+                          f"{offset + int(length)} bytes")
+
+        new_entry = {
+            "sha256": digest.hexdigest(),
+            "suffix": _suffix(url),
+            "size": partial.stat().st_size,
+            "etag": etag,
+            "last_modified": last_modified,
+            "validated": time.time(),
+            "accessed": time.time(),
+        }
+        path = self.object_path(new_entry)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(partial, path)
+        meta_path.unlink(missing_ok=True)
+
+        def update(index):
+            old = index.get(url)
+            index[url] = new_entry
+            if old and not any(e["sha256"] == old["sha256"] for e in index.values()):
+                self.object_path(old).unlink(missing_ok=True)
+            self._evict(index, keep_url=url)
+        self._update_index(update)
+
+        return path
+
+
+_default_cache = None
+
+
+def default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = DownloadCache()
+    return _default_cache
+
+
+def fetch(url, max_age=0, on_chunk=None):
+    """Download `url` through the shared cache and return the local path."""
+    return default_cache().fetch(url, max_age=max_age, on_chunk=on_chunk)
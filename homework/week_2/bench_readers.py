@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Compare the pandas and pyarrow CSV readers on a synthetic yellow_tripdata .csv.gz.
+
+Only the read side is timed; no database is needed.
+
+    uv run python bench_readers.py --rows 2000000
+"""
+
+import gzip
+import os
+import tempfile
+import time
+
+import click
+
+from bench_writers import make_chunks
+from ingest_data import READERS
+
+
+@click.command()
+@click.option('--rows', default=2000000, type=int, help='Rows in the synthetic file')
+@click.option('--chunksize', default=100000, type=int, help='Rows per chunk')
+def main(rows, chunksize):
+    path = os.path.join(tempfile.mkdtemp(), 'yellow_tripdata_bench.csv.gz')
+    with gzip.open(path, 'wt', newline='') as f:
+        for i, chunk in enumerate(make_chunks(rows, chunksize)):
+            chunk.to_csv(f, header=i == 0, index=False)
+    print(f"Wrote {rows} rows to {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+
+    results = {}
+    for name, read_chunks in READERS.items():
+        t0 = time.time()
+        total = sum(len(df_chunk) for df_chunk in read_chunks(path, chunksize))
+        results[name] = time.time() - t0
+        print(f"{name:>6}: {total} rows in {results[name]:.2f}s ({total / results[name]:,.0f} rows/sec)")
+
+    print(f"Arrow speedup over pandas: {results['pandas'] / results['arrow']:.1f}x")
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Compare the to_sql INSERT path with COPY FROM STDIN on the same chunks.
+
+Builds synthetic yellow-taxi chunks with the ingester's dtypes, then loads
+them once per writer into its own table and prints rows/sec.
+
+    uv run python bench_writers.py --rows 500000 --chunksize 100000
+"""
+
+import time
+
+import click
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+from ingest_data import dtype, parse_dates
+from pg_load import WRITERS, write_chunk
+
+
+def make_chunks(rows, chunksize, seed=42):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2021-01-01T00:00:00')
+    chunks = []
+    for offset in range(0, rows, chunksize):
+        n = min(chunksize, rows - offset)
+        pickup = start + rng.integers(0, 31 * 24 * 3600, n).astype('timedelta64[s]')
+        df = pd.DataFrame({
+            col: (rng.integers(1, 266, n) if kind == "Int64" else rng.random(n) * 50)
+            for col, kind in dtype.items() if kind != "string"
+        })
+        df["store_and_fwd_flag"] = rng.choice(["N", "Y"], n)
+        df[parse_dates[0]] = pickup
+        df[parse_dates[1]] = pickup + rng.integers(60, 3600, n).astype('timedelta64[s]')
+        df = df.astype({col: kind for col, kind in dtype.items()})
+        df.index = pd.RangeIndex(offset, offset + n)
+        chunks.append(df)
+    return chunks
+
+
+@click.command()
+@click.option('--pg-user', default='root', help='PostgreSQL username')
+@click.option('--pg-pass', default='root', help='PostgreSQL password')
+@click.option('--pg-host', default='localhost', help='PostgreSQL host')
+@click.option('--pg-port', default='5432', help='PostgreSQL port')
+@click.option('--pg-db', default='ny_taxi', help='PostgreSQL database name')
+@click.option('--rows', default=500000, type=int, help='Total synthetic rows')
+@click.option('--chunksize', default=100000, type=int, help='Rows per chunk')
+def main(pg_user, pg_pass, pg_host, pg_port, pg_db, rows, chunksize):
+    engine = create_engine(f'postgresql://{pg_user}:{pg_pass}@{pg_host}:{pg_port}/{pg_db}')
+    chunks = make_chunks(rows, chunksize)
+
+    results = {}
+    for writer in WRITERS:
+        table = f'bench_writer_{writer}'
+        chunks[0].head(0).to_sql(name=table, con=engine, if_exists="replace")
+
+        t0 = time.time()
+        for chunk in chunks:
+            write_chunk(chunk, table, engine, writer=writer)
+        results[writer] = time.time() - t0
+
+        with engine.connect() as conn:
+            loaded = conn.exec_driver_sql(f'SELECT count(*) FROM "{table}"').scalar()
+        print(f"{writer:>6}: {loaded} rows in {results[writer]:.2f}s "
+              f"({loaded / results[writer]:,.0f} rows/sec)")
+
+    print(f"COPY speedup over INSERT: {results['insert'] / results['copy']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
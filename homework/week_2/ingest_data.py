@@ -1,11 +1,19 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import queue
+import threading
+import urllib.request
+
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
 from sqlalchemy import create_engine
 from tqdm.auto import tqdm
 import click
 
+from pg_load import WRITERS, create_staging_table, publish_staging_table, replace_table, write_chunk
+
 dtype = {
     "VendorID": "Int64",
     "passenger_count": "Int64",
@@ -30,14 +38,16 @@ parse_dates = [
     "tpep_dropoff_datetime"
 ]
 
+# pandas dtypes above mapped to Arrow types for the Arrow reader, and back again
+# so Arrow chunks reach to_sql with the same dtypes pd.read_csv would produce
+arrow_types = {"Int64": pa.int64(), "float64": pa.float64(), "string": pa.string()}
+pandas_types = {pa.int64(): pd.Int64Dtype(), pa.string(): pd.StringDtype()}
 
-def ingest_data(
-        url: str,
-        engine,
-        target_table: str,
-        chunksize: int = 100000,
-) -> pd.DataFrame:
-    df_iter = pd.read_csv(
+ARROW_BLOCK_SIZE = 16 * 1024 * 1024  # 16 MB of CSV text parsed per block
+
+
+def read_chunks_pandas(url, chunksize):
+    return pd.read_csv(
         url,
         dtype=dtype,
         parse_dates=parse_dates,
@@ -45,31 +55,166 @@ def ingest_data(
         chunksize=chunksize
     )
 
-    first_chunk = next(df_iter)
 
-    first_chunk.head(0).to_sql(
-        name=target_table,
-        con=engine,
-        if_exists="replace"
-    )
+def read_chunks_arrow(url, chunksize):
+    """Stream the (gzipped) CSV through pyarrow's multithreaded reader.
 
-    print(f"Table {target_table} created")
+    Record batches are re-sliced into DataFrames of `chunksize` rows with a
+    running index, so they feed the same write path as read_chunks_pandas.
+    """
+    column_types = {col: arrow_types[kind] for col, kind in dtype.items()}
+    column_types.update({col: pa.timestamp("s") for col in parse_dates})
 
-    first_chunk.to_sql(
-        name=target_table,
-        con=engine,
-        if_exists="append"
+    if url.startswith(("http://", "https://")):
+        source = urllib.request.urlopen(url)
+    else:
+        source = open(url, "rb")
+    compression = "gzip" if url.endswith(".gz") else None
+
+    reader = pv.open_csv(
+        pa.input_stream(source, compression=compression),
+        read_options=pv.ReadOptions(use_threads=True, block_size=ARROW_BLOCK_SIZE),
+        convert_options=pv.ConvertOptions(column_types=column_types),
     )
 
-    print(f"Inserted first chunk: {len(first_chunk)}")
+    offset = 0
+    pending = []
+    pending_rows = 0
+
+    def to_frame(table):
+        df_chunk = table.to_pandas(types_mapper=pandas_types.get)
+        df_chunk.index = pd.RangeIndex(offset, offset + len(df_chunk))
+        return df_chunk
+
+    with source:
+        for batch in reader:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            while pending_rows >= chunksize:
+                table = pa.Table.from_batches(pending)
+                yield to_frame(table.slice(0, chunksize))
+                offset += chunksize
+                rest = table.slice(chunksize)
+                pending = rest.to_batches()
+                pending_rows = rest.num_rows
+
+        if pending_rows:
+            yield to_frame(pa.Table.from_batches(pending))
+
+
+READERS = {
+    "pandas": read_chunks_pandas,
+    "arrow": read_chunks_arrow,
+}
+
+
+# Sentinel telling a writer thread that the parser has no more chunks
+_DONE = object()
+
+
+def write_pipelined(df_iter, engine, target_table, writer, writers, queue_depth):
+    """Parse chunks on this thread while `writers` threads drain a bounded queue.
 
-    for df_chunk in tqdm(df_iter):
-        df_chunk.to_sql(
+    Chunks may finish out of order, but progress is reported in chunk order.
+    If any writer fails the parser stops, the remaining queued chunks are
+    dropped and the first error is raised once every thread has exited.
+    """
+    chunks = queue.Queue(maxsize=queue_depth)
+    failed = threading.Event()
+    errors = []
+    lock = threading.Lock()
+    finished = {}
+    next_seq = 0
+    progress = tqdm(unit="rows")
+
+    def report(seq, rows):
+        nonlocal next_seq
+        with lock:
+            finished[seq] = rows
+            while next_seq in finished:
+                progress.update(finished[next_seq])
+                print(f"Inserted chunk {next_seq}: {finished.pop(next_seq)}")
+                next_seq += 1
+
+    def drain():
+        while True:
+            item = chunks.get()
+            if item is _DONE:
+                return
+            if failed.is_set():
+                continue
+            seq, df_chunk = item
+            try:
+                write_chunk(df_chunk, target_table, engine, writer=writer)
+            except Exception as e:
+                with lock:
+                    errors.append((seq, e))
+                failed.set()
+                continue
+            report(seq, len(df_chunk))
+
+    threads = [threading.Thread(target=drain, name=f"writer-{i}", daemon=True) for i in range(writers)]
+    for t in threads:
+        t.start()
+
+    try:
+        for seq, df_chunk in enumerate(df_iter, start=1):
+            if failed.is_set():
+                break
+            chunks.put((seq, df_chunk))
+    finally:
+        for _ in threads:
+            chunks.put(_DONE)
+        for t in threads:
+            t.join()
+        progress.close()
+
+    if errors:
+        seq, e = min(errors, key=lambda err: err[0])
+        raise RuntimeError(f"Writer failed on chunk {seq}, load of {target_table} aborted") from e
+
+
+def ingest_data(
+        url: str,
+        engine,
+        target_table: str,
+        chunksize: int = 100000,
+        writer: str = "insert",
+        writers: int = 1,
+        queue_depth: int = 4,
+        reader: str = "pandas",
+        staged: bool = False,
+) -> pd.DataFrame:
+    df_iter = iter(READERS[reader](url, chunksize))
+
+    first_chunk = next(df_iter)
+
+    if staged:
+        # Load into an UNLOGGED, index-free shadow table and swap it in at the end
+        load_table, index_defs = create_staging_table(first_chunk, target_table, engine)
+    else:
+        load_table = target_table
+        first_chunk.head(0).to_sql(
             name=target_table,
             con=engine,
-            if_exists="append"
+            if_exists="replace"
         )
-        print(f"Inserted chunk: {len(df_chunk)}")
+
+    print(f"Table {load_table} created")
+
+    write_chunk(first_chunk, load_table, engine, writer=writer)
+
+    print(f"Inserted first chunk: {len(first_chunk)}")
+
+    if writers > 1:
+        write_pipelined(df_iter, engine, load_table, writer, writers, queue_depth)
+    else:
+        for df_chunk in tqdm(df_iter):
+            write_chunk(df_chunk, load_table, engine, writer=writer)
+            print(f"Inserted chunk: {len(df_chunk)}")
+
+    if staged:
+        publish_staging_table(target_table, engine, index_defs)
 
     print(f'done ingesting to {target_table}')
 
@@ -83,9 +228,25 @@ def ingest_data(
 @click.option('--month', default=1, type=int, help='Month of the data')
 @click.option('--chunksize', default=100000, type=int, help='Chunk size for ingestion')
 @click.option('--target-table', default='yellow_taxi_data', help='Target table name')
-def main(pg_user, pg_pass, pg_host, pg_port, pg_db, year, month, chunksize, target_table):
+@click.option('--writer', default='insert', type=click.Choice(list(WRITERS)),
+              help='How chunks are written: INSERT via to_sql, or COPY FROM STDIN')
+@click.option('--writers', default=1, type=click.IntRange(min=1),
+              help='Parallel writer threads; more than 1 pipelines parsing and writing')
+@click.option('--queue-depth', default=4, type=click.IntRange(min=1),
+              help='Parsed chunks allowed to wait for a writer')
+@click.option('--reader', default='pandas', type=click.Choice(list(READERS)),
+              help='CSV reader: single-threaded pandas or multithreaded pyarrow')
+@click.option('--staged', is_flag=True,
+              help='Load into an UNLOGGED shadow table and swap it in atomically when done')
+def main(pg_user, pg_pass, pg_host, pg_port, pg_db, year, month, chunksize, target_table, writer,
+         writers, queue_depth, reader, staged):
 
-    engine = create_engine(f'postgresql://{pg_user}:{pg_pass}@{pg_host}:{pg_port}/{pg_db}')
+    # One pooled connection per writer thread
+    engine = create_engine(
+        f'postgresql://{pg_user}:{pg_pass}@{pg_host}:{pg_port}/{pg_db}',
+        pool_size=writers,
+        max_overflow=0
+    )
     url_prefix = 'https://github.com/DataTalksClub/nyc-tlc-data/releases/download/yellow'
 
     url = f'{url_prefix}/yellow_tripdata_{year:04d}-{month:02d}.csv.gz'
@@ -94,11 +255,16 @@ def main(pg_user, pg_pass, pg_host, pg_port, pg_db, year, month, chunksize, targ
         url=url,
         engine=engine,
         target_table=target_table,
-        chunksize=chunksize
+        chunksize=chunksize,
+        writer=writer,
+        writers=writers,
+        queue_depth=queue_depth,
+        reader=reader,
+        staged=staged
     )
     # Zone Table
     df_zone = pd.read_csv('taxi_zone_lookup.csv')
-    df_zone.to_sql(name='taxi_zone', con=engine, if_exists='replace')
+    replace_table(df_zone, 'taxi_zone', engine, writer=writer, staged=staged)
 
     print("Table created and Data injected successfully.")
 
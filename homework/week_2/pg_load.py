@@ -0,0 +1,109 @@
+"""Helpers for bulk-loading DataFrames into Postgres."""
+
+import csv
+import io
+
+from sqlalchemy import text
+
+
+def copy_from_stdin(table, conn, keys, data_iter):
+    """`DataFrame.to_sql` method that streams the chunk through COPY ... FROM STDIN.
+
+    Rows are rendered as CSV into an in-memory buffer, so no temp files are
+    written. Non-null values are always quoted, which lets Postgres tell an
+    empty string apart from a NULL (unquoted empty field).
+    """
+    buf = io.StringIO()
+    csv.writer(buf, quoting=csv.QUOTE_NOTNULL).writerows(data_iter)
+    buf.seek(0)
+
+    columns = ', '.join(f'"{k}"' for k in keys)
+    table_name = f'"{table.schema}"."{table.name}"' if table.schema else f'"{table.name}"'
+
+    dbapi_conn = conn.connection
+    with dbapi_conn.cursor() as cur:
+        cur.copy_expert(f'COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT csv)', buf)
+
+
+# Values are passed as `method=` to DataFrame.to_sql; None is pandas' own INSERT path
+WRITERS = {
+    'insert': None,
+    'copy': copy_from_stdin,
+}
+
+
+def write_chunk(df, table_name, engine, writer='insert', **kwargs):
+    """Append one chunk to an existing table using the chosen writer."""
+    df.to_sql(
+        name=table_name,
+        con=engine,
+        if_exists='append',
+        method=WRITERS[writer],
+        **kwargs
+    )
+
+
+def staging_name(table_name):
+    return f"{table_name}__staging"
+
+
+def _index_names(conn, table_name):
+    return conn.execute(
+        text("SELECT indexname, indexdef FROM pg_indexes "
+             "WHERE schemaname = current_schema() AND tablename = :table"),
+        {"table": table_name}
+    ).all()
+
+
+def create_staging_table(frame, table_name, engine, **kwargs):
+    """Create an UNLOGGED, index-free shadow of `table_name` shaped like `frame`.
+
+    Returns the shadow table name and the CREATE INDEX statements to_sql made
+    for it, which publish_staging_table replays once the data is in.
+    """
+    shadow = staging_name(table_name)
+    frame.head(0).to_sql(name=shadow, con=engine, if_exists="replace", **kwargs)
+
+    with engine.begin() as conn:
+        indexes = _index_names(conn, shadow)
+        for name, _ in indexes:
+            conn.exec_driver_sql(f'DROP INDEX "{name}"')
+        conn.exec_driver_sql(f'ALTER TABLE "{shadow}" SET UNLOGGED')
+
+    return shadow, [indexdef for _, indexdef in indexes]
+
+
+def publish_staging_table(table_name, engine, index_defs=()):
+    """Index and ANALYZE the loaded shadow table, then swap it in for `table_name`.
+
+    The shadow is made LOGGED again before its indexes are built so it survives
+    a crash once live. The drop/rename runs in a single transaction: readers see
+    the old table until commit and the fully loaded one after it.
+    """
+    shadow = staging_name(table_name)
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f'ALTER TABLE "{shadow}" SET LOGGED')
+        for indexdef in index_defs:
+            conn.exec_driver_sql(indexdef)
+        conn.exec_driver_sql(f'ANALYZE "{shadow}"')
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f'DROP TABLE IF EXISTS "{table_name}"')
+        conn.exec_driver_sql(f'ALTER TABLE "{shadow}" RENAME TO "{table_name}"')
+        for name, _ in _index_names(conn, table_name):
+            if shadow in name:
+                conn.exec_driver_sql(f'ALTER INDEX "{name}" RENAME TO "{name.replace(shadow, table_name)}"')
+
+    print(f"Swapped {shadow} in as {table_name}")
+
+
+def replace_table(df, table_name, engine, writer='insert', staged=False, **kwargs):
+    """Replace `table_name` with the contents of `df`, optionally through a staged swap."""
+    if staged:
+        shadow, index_defs = create_staging_table(df, table_name, engine, **kwargs)
+        write_chunk(df, shadow, engine, writer=writer, **kwargs)
+        publish_staging_table(table_name, engine, index_defs)
+    else:
+        df.head(0).to_sql(name=table_name, con=engine, if_exists='replace', **kwargs)
+        write_chunk(df, table_name, engine, writer=writer, **kwargs)
@@ -4,14 +4,18 @@
 #     "google-cloud-storage>=3.9.0",
 # ]
 # ///
-import os
+import argparse
 import sys
-import urllib.request
 from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from google.cloud import storage
 from google.api_core.exceptions import NotFound, Forbidden #google-cloud-storage
 import time
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "shared"))
+import gcs_sync
+import tlc_cache
+
 # ---------------------------------------------------------
 # CONFIGURATION
 # ---------------------------------------------------------
@@ -21,11 +25,8 @@ BUCKET_NAME = "x"
 # URL สำหรับโหลดข้อมูล Yellow Taxi ปี 2024 เดือน 1-6
 BASE_URL = "https://d37ci6vzurychx.cloudfront.net/trip-data/yellow_tripdata_2024-"
 MONTHS = [f"{i:02d}" for i in range(1, 7)] # สร้าง list ["01", "02", ..., "06"]
-DOWNLOAD_DIR = "."
 CHUNK_SIZE = 8 * 1024 * 1024 # 8 MB
 
-os.makedirs(DOWNLOAD_DIR, exist_ok=True)
-
 # ---------------------------------------------------------
 # AUTHENTICATION (GOOGLE SDK)
 # ---------------------------------------------------------
@@ -55,15 +56,14 @@ def create_bucket_if_not_exists(bucket_name):
         sys.exit(1)
 
 def download_file(month):
-    """ดาวน์โหลดไฟล์ Parquet จาก URL ลงเครื่อง"""
+    """ดาวน์โหลดไฟล์ Parquet ผ่าน shared cache (tlc_cache) คืนค่า (blob_name, file_path)"""
     url = f"{BASE_URL}{month}.parquet"
-    file_path = os.path.join(DOWNLOAD_DIR, f"yellow_tripdata_2024-{month}.parquet")
+    blob_name = f"yellow_tripdata_2024-{month}.parquet"
 
     try:
-        print(f"Downloading {url}...")
-        urllib.request.urlretrieve(url, file_path)
-        print(f"Downloaded: {file_path}")
-        return file_path
+        file_path = tlc_cache.fetch(url)
+        print(f"Downloaded: {blob_name} -> {file_path}")
+        return blob_name, file_path
     except Exception as e:
         print(f"Failed to download {url}: {e}")
         return None
@@ -72,9 +72,8 @@ def verify_gcs_upload(bucket, blob_name):
     """ตรวจสอบว่าไฟล์ขึ้นไปอยู่บน GCS จริงไหม"""
     return storage.Blob(bucket=bucket, name=blob_name).exists(client)
 
-def upload_to_gcs(bucket, file_path, max_retries=3):
+def upload_to_gcs(bucket, blob_name, file_path, max_retries=3):
     """อัปโหลดไฟล์ขึ้น GCS พร้อมระบบ Retry"""
-    blob_name = os.path.basename(file_path)
     blob = bucket.blob(blob_name)
     blob.chunk_size = CHUNK_SIZE
 
@@ -86,8 +85,7 @@ def upload_to_gcs(bucket, file_path, max_retries=3):
 
             if verify_gcs_upload(bucket, blob_name):
                 print(f"Verification successful for {blob_name}")
-                # ลบไฟล์ในเครื่องทิ้งเพื่อประหยัดพื้นที่ (Optional)
-                os.remove(file_path) 
+                # ไม่ลบไฟล์ในเครื่อง: ไฟล์อยู่ใน shared cache ซึ่งจัดการพื้นที่เอง (LRU)
                 return
             else:
                 print(f"Verification failed for {blob_name}, retrying...")
@@ -98,24 +96,47 @@ def upload_to_gcs(bucket, file_path, max_retries=3):
 
     print(f"Giving up on {file_path} after {max_retries} attempts.")
 
+def sync_to_gcs(bucket):
+    """Sync แบบ incremental: โอนเฉพาะเดือนที่ใหม่/เปลี่ยน และลบเฉพาะไฟล์ที่ต้นทางไม่มีแล้ว"""
+    sources = {f"yellow_tripdata_2024-{month}.parquet": f"{BASE_URL}{month}.parquet" for month in MONTHS}
+
+    def transfer(blob_name, url):
+        blob = bucket.blob(blob_name, chunk_size=CHUNK_SIZE)
+        # crc32c คำนวณระหว่างโอน และ client ตรวจกับ GCS ตอนจบ ไม่ต้องเรียก exists() ซ้ำ
+        _, crc32c = gcs_sync.stream_to_blob(blob, url)
+        print(f"Uploaded: gs://{bucket.name}/{blob_name} (crc32c {crc32c})")
+        return crc32c
+
+    summary = gcs_sync.sync(bucket, sources, transfer, concurrency=4)
+    print(f"Sync summary: {summary}")
+
 # ---------------------------------------------------------
 # MAIN EXECUTION
 # ---------------------------------------------------------
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load Yellow Taxi 2024-01..06 parquet files into GCS")
+    parser.add_argument("--sync", action="store_true",
+                        help="โอนเฉพาะไฟล์ที่ใหม่หรือเปลี่ยนไป ตาม manifest ใน bucket")
+    args = parser.parse_args()
+
     # 1. เตรียม Bucket
     bucket = create_bucket_if_not_exists(BUCKET_NAME)
 
+    if args.sync:
+        sync_to_gcs(bucket)
+        sys.exit(0)
+
     # 2. ดาวน์โหลดไฟล์ (Parallel Download)
     print(f"Starting download for months: {MONTHS}")
     with ThreadPoolExecutor(max_workers=4) as executor:
-        file_paths = list(executor.map(download_file, MONTHS))
+        downloads = list(executor.map(download_file, MONTHS))
 
     # 3. อัปโหลดไฟล์ (Parallel Upload)
     print("Starting upload to GCS...")
-    valid_files = list(filter(None, file_paths))
+    valid_files = list(filter(None, downloads))
     
     # ใช้ lambda เพื่อส่ง bucket object เข้าไปในฟังก์ชัน
     with ThreadPoolExecutor(max_workers=4) as executor:
-        executor.map(lambda f: upload_to_gcs(bucket, f), valid_files)
+        executor.map(lambda d: upload_to_gcs(bucket, *d), valid_files)
 
     print("\nAll operations completed. Please check your GCS bucket.")
\ No newline at end of file
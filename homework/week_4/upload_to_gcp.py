@@ -1,8 +1,20 @@
-import requests
+import argparse
+import sys
+import threading
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from google.api_core.exceptions import GoogleAPIError
 from google.cloud import storage
 from google.cloud import bigquery
 from google.oauth2 import service_account
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "shared"))
+import gcs_sync
+import tlc_cache
+
 # --- CONFIGURATION ---
 PROJECT_ID = "x"
 BUCKET_NAME = "y"
@@ -10,6 +22,12 @@ CREDENTIALS_FILE = "z"
 
 BASE_URL = "https://github.com/DataTalksClub/nyc-tlc-data/releases/download"
 
+# Worst-case bytes one transfer holds at once: a downloaded chunk plus a full
+# resumable upload buffer. Transfers stream, so this does not grow with file size.
+TRANSFER_BUFFER_BYTES = tlc_cache.CHUNK_SIZE + gcs_sync.UPLOAD_CHUNK_SIZE
+
+TAXI_TYPES = ["green", "yellow", "fhv"]
+
 credentials = service_account.Credentials.from_service_account_file(CREDENTIALS_FILE)
 storage_client = storage.Client(credentials=credentials, project=PROJECT_ID)
 bq_client = bigquery.Client(credentials=credentials, project=PROJECT_ID)
@@ -34,22 +52,95 @@ def delete_old_files(prefix):
         print(f"Deleted {len(blobs)} old files from gs://{BUCKET_NAME}/{prefix}")
 
 
-def upload_csv_gz(taxi_type, year, month):
+class ByteBudget:
+    """Caps the worst-case buffer memory of all transfers running at the same time.
+
+    Each transfer reserves its peak (TRANSFER_BUFFER_BYTES) for its whole
+    run rather than the bytes it actually holds at a given moment, so in
+    practice this limits how many transfers run at once to
+    max_bytes // TRANSFER_BUFFER_BYTES.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def reserve(self, n):
+        n = min(n, self.max_bytes)
+        with self._cond:
+            self._cond.wait_for(lambda: self.in_flight + n <= self.max_bytes)
+            self.in_flight += n
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= n
+                self._cond.notify_all()
+
+
+def month_source(taxi_type, year, month):
+    """(blob_name, source url) for one month of one taxi type."""
     filename = f"{taxi_type}_tripdata_{year}-{month:02d}"
-    url = f"{BASE_URL}/{taxi_type}/{filename}.csv.gz"
-    blob_name = f"{taxi_type}/{filename}.csv.gz"
+    return f"{taxi_type}/{filename}.csv.gz", f"{BASE_URL}/{taxi_type}/{filename}.csv.gz"
 
-    print(f"Processing {filename}...")
 
-    r = requests.get(url)
-    if r.status_code != 200:
-        print(f"  FAILED to download {url} (status {r.status_code})")
-        return
+def transfer_blob(blob_name, url, budget=None):
+    """Stream a source file (through the download cache) into a resumable GCS upload.
 
+    Returns the crc32c of the uploaded object, or None if the download or
+    upload failed, so one bad month does not abort the others.
+    """
+    print(f"Processing {blob_name}...")
     bucket = storage_client.bucket(BUCKET_NAME)
-    blob = bucket.blob(blob_name)
-    blob.upload_from_string(r.content, content_type="application/gzip")
+
+    with budget.reserve(TRANSFER_BUFFER_BYTES) if budget else nullcontext():
+        try:
+            _, crc32c = gcs_sync.stream_to_blob(bucket.blob(blob_name), url, content_type="application/gzip")
+        except urllib.error.HTTPError as e:
+            print(f"  FAILED to download {url} (status {e.code})")
+            return None
+        except (OSError, GoogleAPIError) as e:
+            # URLError, timeouts and connection resets are OSErrors
+            print(f"  FAILED {blob_name}: {type(e).__name__}: {e}")
+            return None
+
     print(f"  Uploaded {blob_name} to GCS.")
+    return crc32c
+
+
+def upload_csv_gz(taxi_type, year, month, budget=None):
+    return transfer_blob(*month_source(taxi_type, year, month), budget=budget)
+
+
+def upload_months(months, concurrency, max_inflight_bytes):
+    """Run upload_csv_gz over (taxi_type, year, month) tuples on a bounded worker pool."""
+    budget = ByteBudget(max_inflight_bytes)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda m: upload_csv_gz(*m, budget=budget), months))
+
+    failed = [m for m, crc32c in zip(months, results) if crc32c is None]
+    print(f"Uploaded {len(months) - len(failed)}/{len(months)} files")
+    for taxi_type, year, month in failed:
+        print(f"  missing {taxi_type} {year}-{month:02d}")
+
+
+def sync_months(months, concurrency, max_inflight_bytes):
+    """Transfer only new or changed months and delete objects whose source is gone."""
+    budget = ByteBudget(max_inflight_bytes)
+    bucket = storage_client.bucket(BUCKET_NAME)
+
+    for taxi_type in TAXI_TYPES:
+        sources = dict(month_source(*m) for m in months if m[0] == taxi_type)
+        summary = gcs_sync.sync(
+            bucket,
+            sources,
+            transfer=lambda blob_name, url: transfer_blob(blob_name, url, budget=budget),
+            prefix=f"{taxi_type}/",
+            concurrency=concurrency,
+        )
+        print(f"  {taxi_type}: {summary}")
 
 
 def create_csv_external_table(taxi_type):
@@ -70,6 +161,15 @@ def create_csv_external_table(taxi_type):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upload TLC csv.gz files to GCS and create external tables")
+    parser.add_argument("--concurrency", type=int, default=8, help="Months transferred at the same time")
+    parser.add_argument("--max-inflight-mb", type=int, default=256,
+                        help="Buffer memory shared by running transfers; each reserves its worst case "
+                             f"({TRANSFER_BUFFER_BYTES // (1024 * 1024)} MB), so this also caps concurrent transfers")
+    parser.add_argument("--sync", action="store_true",
+                        help="Incremental sync against the bucket manifest instead of a full re-upload")
+    args = parser.parse_args()
+
     # 1. Create Bucket
     create_bucket_if_not_exists()
 
@@ -80,18 +180,24 @@ if __name__ == "__main__":
     bq_client.create_dataset(dataset, exists_ok=True)
     print(f"Dataset {dataset_id} ready.")
 
-    # 3. Upload Green & Yellow taxi data (2019-2020)
-    for taxi_type in ["green", "yellow"]:
-        delete_old_files(f"{taxi_type}/")
-        for year in [2019, 2020]:
-            for month in range(1, 13):
-                upload_csv_gz(taxi_type, year, month)
-        create_csv_external_table(taxi_type)
+    # 3. Green & Yellow taxi data (2019-2020), FHV data (2019 only)
+    months = [
+        (taxi_type, year, month)
+        for taxi_type in ["green", "yellow"]
+        for year in [2019, 2020]
+        for month in range(1, 13)
+    ]
+    months += [("fhv", 2019, month) for month in range(1, 13)]
+
+    # 4. Upload all months in parallel
+    if args.sync:
+        sync_months(months, args.concurrency, args.max_inflight_mb * 1024 * 1024)
+    else:
+        for taxi_type in TAXI_TYPES:
+            delete_old_files(f"{taxi_type}/")
+        upload_months(months, args.concurrency, args.max_inflight_mb * 1024 * 1024)
 
-    # 4. Upload FHV data (2019 only)
-    delete_old_files("fhv/")
-    for month in range(1, 13):
-        upload_csv_gz("fhv", 2019, month)
-    create_csv_external_table("fhv")
+    for taxi_type in TAXI_TYPES:
+        create_csv_external_table(taxi_type)
 
     print("\nAll Done! Setup complete.")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Compare the pandas and Arrow transforms in load_trips.py on a synthetic month.
+
+Writes a yellow_tripdata-shaped Parquet file (all 19 source columns), then
+runs each transform in its own subprocess so peak memory is measured
+independently. Both paths include serializing the result to Parquet, which
+is what the BigQuery load job receives; nothing is uploaded.
+
+Usage:
+    uv run --with pandas --with pyarrow --with google-cloud-bigquery bench_transform.py --rows 3000000
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+def write_month(path: str, rows: int, seed: int = 42):
+    """A month of fake yellow trips with the real file's column names and types."""
+    rng = np.random.default_rng(seed)
+    pickup = np.datetime64("2024-01-01T00:00:00") + rng.integers(0, 31 * 24 * 3600, rows).astype("timedelta64[s]")
+    dropoff = pickup + rng.integers(60, 3600, rows).astype("timedelta64[s]")
+    money = lambda: np.round(rng.random(rows) * 50, 2)
+
+    table = pa.table({
+        "VendorID": pa.array(rng.integers(1, 3, rows), pa.int32()),
+        "tpep_pickup_datetime": pa.array(pickup.astype("datetime64[us]")),
+        "tpep_dropoff_datetime": pa.array(dropoff.astype("datetime64[us]")),
+        "passenger_count": pa.array(rng.integers(0, 6, rows).astype("float64")),
+        "trip_distance": money(),
+        "RatecodeID": pa.array(rng.integers(1, 7, rows).astype("float64")),
+        "store_and_fwd_flag": pa.array(rng.choice(["N", "Y"], rows)),
+        "PULocationID": pa.array(rng.integers(1, 266, rows), pa.int32()),
+        "DOLocationID": pa.array(rng.integers(1, 266, rows), pa.int32()),
+        "payment_type": rng.integers(0, 5, rows),
+        "fare_amount": money(),
+        "extra": money(),
+        "mta_tax": money(),
+        "tip_amount": money(),
+        "tolls_amount": money(),
+        "improvement_surcharge": money(),
+        "total_amount": money(),
+        "congestion_surcharge": money(),
+        "Airport_fee": money(),
+    })
+    pq.write_table(table, path)
+
+
+def run_one(mode: str, path: str):
+    """Child process: transform + serialize once, print seconds and peak RSS (MB)."""
+    import load_trips
+
+    t0 = time.time()
+    if mode == "pandas":
+        df = load_trips.transform_pandas(path, "yellow")
+        df.to_parquet(tempfile.TemporaryFile(), index=False)
+        rows = len(df)
+    else:
+        table = load_trips.transform_arrow(path, "yellow")
+        load_trips.to_parquet_buffer(table)
+        rows = table.num_rows
+    elapsed = time.time() - t0
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak_kb / 1024 / 1024 if sys.platform == "darwin" else peak_kb / 1024
+    print(rows, elapsed, peak_mb)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pandas vs Arrow load_trips transform")
+    parser.add_argument("--rows", type=int, default=3_000_000, help="Rows in the synthetic month")
+    parser.add_argument("--run", choices=["pandas", "arrow"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_one(args.run, args.path)
+        return
+
+    path = os.path.join(tempfile.mkdtemp(), "yellow_tripdata_bench.parquet")
+    write_month(path, args.rows)
+    print(f"Wrote {args.rows:,} rows to {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+
+    results = {}
+    for mode in ("pandas", "arrow"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--run", mode, "--path", path],
+            check=True, capture_output=True, text=True,
+        ).stdout.split()
+        rows, elapsed, peak_mb = int(out[-3]), float(out[-2]), float(out[-1])
+        results[mode] = (elapsed, peak_mb)
+        print(f"{mode:>6}: {rows:,} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/sec), "
+              f"peak RSS {peak_mb:,.0f} MB")
+
+    print(f"Arrow: {results['pandas'][0] / results['arrow'][0]:.1f}x faster, "
+          f"{results['pandas'][1] / results['arrow'][1]:.1f}x less peak memory")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
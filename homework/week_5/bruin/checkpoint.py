@@ -0,0 +1,182 @@
+"""
+SQLite checkpoint journal for load_trips.py.
+
+Progress is tracked per Parquet row group rather than per file, so a run
+that dies partway through a month resumes at the next uncommitted row
+group. The journal lives next to the script (.load_journal.sqlite) in WAL
+mode, which keeps commits cheap and lets `load_trips.py status` read it
+while a backfill is writing.
+
+Tables:
+    files       one row per month file: source checksum, row groups, state
+    row_groups  one row per committed row group: rows, payload checksum,
+                BigQuery load job id, seconds taken
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+JOURNAL_FILE = Path(__file__).parent / ".load_journal.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    key          TEXT PRIMARY KEY,  -- e.g. yellow-2019-01
+    url          TEXT,
+    sha256       TEXT,              -- of the source file the row groups came from
+    row_groups   INTEGER,
+    total_rows   INTEGER,
+    state        TEXT NOT NULL,     -- loading | done
+    started_at   REAL,
+    finished_at  REAL
+);
+CREATE TABLE IF NOT EXISTS row_groups (
+    key          TEXT NOT NULL REFERENCES files(key),
+    row_group    INTEGER NOT NULL,
+    rows         INTEGER NOT NULL,
+    checksum     TEXT NOT NULL,     -- crc32 of the Parquet payload sent to BigQuery
+    job_id       TEXT NOT NULL,
+    seconds      REAL NOT NULL,
+    committed_at REAL NOT NULL,
+    PRIMARY KEY (key, row_group)
+);
+"""
+
+
+class SourceChangedError(RuntimeError):
+    """A partially loaded file's source changed; its committed rows are already in BigQuery."""
+
+
+class CheckpointJournal:
+    """Thread-safe access to the journal; one connection shared under a lock."""
+
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only risks the last commits on power loss, never corruption
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ---------------------------------------------------------
+    # Files
+    # ---------------------------------------------------------
+
+    def import_completed(self, keys):
+        """Mark files finished by the old .load_progress.json as done."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO files (key, state) VALUES (?, 'done')",
+                [(key,) for key in keys],
+            )
+
+    def completed_keys(self) -> set:
+        return {key for (key,) in self._execute("SELECT key FROM files WHERE state = 'done'")}
+
+    def start_file(self, key, url, sha256, row_groups, total_rows) -> dict:
+        """Register a file about to be loaded; returns {row_group: job_id} already committed.
+
+        Raises SourceChangedError if the source changed since an earlier
+        partial run that already committed row groups: those rows are in the
+        table, and reloading the new file on top would duplicate the month.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT sha256 FROM files WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[0] not in (None, sha256):
+                loaded = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(rows), 0) FROM row_groups WHERE key = ?", (key,)
+                ).fetchone()
+                if loaded[0]:
+                    raise SourceChangedError(
+                        f"{key}: source file changed after "
+                        f"{loaded[0]} row groups ({loaded[1]:,} rows) were loaded from the old one. "
+                        f"Delete those rows from the target table, then run "
+                        f"`load_trips.py forget {key}` to reload the month."
+                    )
+            self._conn.execute(
+                """INSERT INTO files (key, url, sha256, row_groups, total_rows, state, started_at)
+                   VALUES (?, ?, ?, ?, ?, 'loading', ?)
+                   ON CONFLICT (key) DO UPDATE SET url = excluded.url, sha256 = excluded.sha256,
+                       row_groups = excluded.row_groups, total_rows = excluded.total_rows,
+                       state = 'loading', started_at = COALESCE(files.started_at, excluded.started_at)""",
+                (key, url, sha256, row_groups, total_rows, time.time()),
+            )
+            return dict(self._conn.execute(
+                "SELECT row_group, job_id FROM row_groups WHERE key = ?", (key,)
+            ).fetchall())
+
+    def commit_row_group(self, key, row_group, rows, checksum, job_id, seconds):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO row_groups VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, row_group, rows, checksum, job_id, seconds, time.time()),
+            )
+
+    def forget(self, key) -> int:
+        """Drop a file and its row-group checkpoints; returns the row groups removed."""
+        with self._lock, self._conn:
+            removed = self._conn.execute("DELETE FROM row_groups WHERE key = ?", (key,)).rowcount
+            self._conn.execute("DELETE FROM files WHERE key = ?", (key,))
+            return removed
+
+    def finish_file(self, key):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE files SET state = 'done', finished_at = ? WHERE key = ?", (time.time(), key)
+            )
+
+    # ---------------------------------------------------------
+    # Status
+    # ---------------------------------------------------------
+
+    def status(self, expected_keys):
+        """Print what is done, what is half-loaded, throughput and an ETA."""
+        expected_keys = list(expected_keys)
+        done = self.completed_keys()
+        loading = self._execute(
+            """SELECT f.key, f.row_groups, f.total_rows, COUNT(r.row_group), COALESCE(SUM(r.rows), 0)
+               FROM files f LEFT JOIN row_groups r ON r.key = f.key
+               WHERE f.state = 'loading' GROUP BY f.key ORDER BY f.key"""
+        )
+        rows, seconds, groups = self._execute(
+            "SELECT COALESCE(SUM(rows), 0), COALESCE(SUM(seconds), 0), COUNT(*) FROM row_groups"
+        )[0]
+        window = self._execute(
+            "SELECT COALESCE(SUM(rows), 0), MIN(committed_at), MAX(committed_at) FROM row_groups "
+            "WHERE committed_at > (SELECT MAX(committed_at) FROM row_groups) - 3600"
+        )[0]
+
+        remaining = [key for key in expected_keys if key not in done]
+        print(f"Journal: {self.path}")
+        print(f"Files done: {len(done & set(expected_keys))}/{len(expected_keys)}, "
+              f"remaining: {len(remaining)}")
+        print(f"Row groups committed: {groups:,} ({rows:,} rows, {seconds:,.0f}s in load jobs)")
+        if seconds:
+            print(f"Throughput: {rows / seconds:,.0f} rows/sec while loading")
+        if window[1] is not None and window[2] > window[1]:
+            recent = window[0] / (window[2] - window[1])
+            print(f"Last hour: {recent:,.0f} rows/sec wall clock")
+            # Files finished through the journal give an average size for the rest
+            avg_rows = self._execute(
+                "SELECT AVG(total_rows) FROM files WHERE state = 'done' AND total_rows IS NOT NULL"
+            )[0][0]
+            if avg_rows and recent:
+                left = len(remaining) * avg_rows - sum(loaded for *_, loaded in loading)
+                print(f"ETA: ~{max(left, 0) / recent / 3600:.1f}h for ~{max(left, 0):,.0f} rows")
+
+        if loading:
+            print("Partially loaded:")
+            for key, total_groups, total_rows, committed, loaded in loading:
+                print(f"  {key}: {committed}/{total_groups} row groups, {loaded:,}/{total_rows:,} rows")
+        if remaining:
+            preview = ", ".join(remaining[:5]) + (" ..." if len(remaining) > 5 else "")
+            print(f"Next up: {preview}")
@@ -5,20 +5,50 @@ Bypasses dlt/ingestr to avoid memory and schema issues with 315M+ rows.
 
 Usage:
     uv run --with pandas --with pyarrow --with google-cloud-bigquery load_trips.py
-
-Resumes from where it left off by checking a local progress file.
+    uv run --with pandas --with pyarrow --with google-cloud-bigquery load_trips.py --concurrent
+
+    uv run --with pandas --with pyarrow --with google-cloud-bigquery load_trips.py status
+
+Resumes from where it left off using a SQLite checkpoint journal
+(checkpoint.py) that records every committed Parquet row group, so a crash
+mid-month only redoes the row group that was in flight. Load jobs get
+deterministic ids, so a row group whose job finished just before a crash is
+recognized instead of appended twice. `status` summarizes the journal.
+If a half-loaded month's source file changes, the load stops with an error
+instead of appending the new file on top of the rows already loaded; delete
+those rows from the table, then `forget <key>` lets the month load again.
+
+--concurrent loads several months at once. The number of months in flight
+is an AIMD limit: it grows by one slot per round of successful loads and is
+halved whenever the source answers 403/429, and retries back off
+exponentially with full jitter instead of the fixed cooldowns.
 """
 
+import io
 import os
 import sys
 import json
 import time
+import zlib
+import hashlib
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from google.api_core.exceptions import Conflict
 from google.cloud import bigquery
 
+from checkpoint import CheckpointJournal
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "shared"))
+import tlc_cache
+
 # Configuration
 PROJECT_ID = "bruin-zoomcamp-2026"
 DATASET_ID = "ingestion"
@@ -35,6 +65,12 @@ RETRY_BASE_WAIT = 30
 COOLDOWN_BETWEEN_FILES = 5
 COOLDOWN_BETWEEN_MONTHS = 10
 
+# Concurrent mode: jittered exponential backoff and AIMD concurrency bounds
+BACKOFF_BASE = 5
+BACKOFF_CAP = 300
+INITIAL_WORKERS = 2
+MAX_WORKERS = 8
+
 PROGRESS_FILE = Path(__file__).parent / ".load_progress.json"
 
 # Column mapping: source camelCase -> BigQuery snake_case
@@ -65,65 +101,211 @@ def save_progress(completed: set):
     PROGRESS_FILE.write_text(json.dumps(sorted(completed)))
 
 
-def fetch_and_upload_month(client: bigquery.Client, year: int, month: int,
-                           taxi_type: str, completed: set) -> int:
-    """Download one month of data and upload to BigQuery. Returns row count."""
-    key = f"{taxi_type}-{year}-{month:02d}"
-    if key in completed:
-        print(f"  SKIP {key} (already loaded)")
-        return 0
+def is_rate_limited(e: Exception) -> bool:
+    return "403" in str(e) or "429" in str(e)
+
+
+def iter_months():
+    """Yield (year, month) from START to END inclusive."""
+    year, month = START_YEAR, START_MONTH
+    while (year, month) <= (END_YEAR, END_MONTH):
+        yield year, month
+        # Advance to next month
+        if month == 12:
+            year += 1
+            month = 1
+        else:
+            month += 1
 
-    url = f"https://d37ci6vzurychx.cloudfront.net/trip-data/{taxi_type}_tripdata_{year}-{month:02d}.parquet"
 
+def datetime_columns(taxi_type: str) -> tuple:
+    """Source pickup/dropoff column names (tpep_ for yellow, lpep_ for green)."""
     if taxi_type == "yellow":
-        pickup_col, dropoff_col = "tpep_pickup_datetime", "tpep_dropoff_datetime"
-    else:
-        pickup_col, dropoff_col = "lpep_pickup_datetime", "lpep_dropoff_datetime"
+        return "tpep_pickup_datetime", "tpep_dropoff_datetime"
+    return "lpep_pickup_datetime", "lpep_dropoff_datetime"
 
-    for attempt in range(1, MAX_RETRIES + 1):
+
+def transform_pandas(path, taxi_type: str) -> pd.DataFrame:
+    """Original pandas transform: read every column, then subset, rename and cast."""
+    pickup_col, dropoff_col = datetime_columns(taxi_type)
+    df = pd.read_parquet(path)
+
+    # Rename datetime columns
+    df = df.rename(columns={pickup_col: "pickup_datetime", dropoff_col: "dropoff_datetime"})
+
+    # Keep only needed columns
+    df = df[[c for c in KEEP_COLS_SOURCE if c in df.columns]]
+
+    # Rename camelCase to snake_case
+    df = df.rename(columns=COLUMN_RENAME)
+
+    # Strip timezone info
+    for col in df.select_dtypes(include=["datetimetz"]).columns:
+        df[col] = df[col].dt.tz_localize(None)
+
+    # Add metadata columns
+    df["taxi_type"] = taxi_type
+    df["extracted_at"] = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    # Fix integer columns (NaN -> nullable Int64, then to float for BQ compatibility)
+    # BigQuery INTEGER columns accept int values; NaN rows will be NULL
+    for col in INT_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype("Int64")
+
+    return df
+
+
+def arrow_projection(source_names, taxi_type: str) -> dict:
+    """Output name -> source column, for the needed columns this file has."""
+    pickup_col, dropoff_col = datetime_columns(taxi_type)
+    source_cols = {"pickup_datetime": pickup_col, "dropoff_datetime": dropoff_col}
+    available = set(source_names)
+    return {
+        COLUMN_RENAME.get(col, col): source_cols.get(col, col)
+        for col in KEEP_COLS_SOURCE
+        if source_cols.get(col, col) in available
+    }
+
+
+def finish_arrow(table: pa.Table, projection: dict, taxi_type: str, extracted_at: datetime) -> pa.Table:
+    """Rename, cast and add metadata columns to a table read with `projection`."""
+    table = table.rename_columns(list(projection))
+
+    # Strip timezone info and cast integer columns (nulls stay null)
+    fields = []
+    for field in table.schema:
+        if pa.types.is_timestamp(field.type):
+            fields.append(field.with_type(pa.timestamp(field.type.unit)))
+        elif field.name in INT_COLS:
+            fields.append(field.with_type(pa.int64()))
+        else:
+            fields.append(field)
+    table = table.cast(pa.schema(fields))
+
+    # Add metadata columns
+    table = table.append_column("taxi_type", pa.repeat(taxi_type, table.num_rows))
+    table = table.append_column(
+        "extracted_at", pa.repeat(pa.scalar(extracted_at, pa.timestamp("us")), table.num_rows)
+    )
+    return table
+
+
+def transform_arrow(path, taxi_type: str) -> pa.Table:
+    """Same output as transform_pandas, built from a column-projected Arrow read.
+
+    Only the 11 needed columns are decoded from the file, and renames, casts
+    and the metadata columns are zero-copy or Arrow compute operations, so
+    the month is never materialized as a pandas DataFrame.
+    """
+    projection = arrow_projection(pq.read_schema(path).names, taxi_type)
+    table = pq.read_table(path, columns=list(projection.values()))
+    extracted_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    return finish_arrow(table, projection, taxi_type, extracted_at)
+
+
+def to_parquet_buffer(table: pa.Table) -> io.BytesIO:
+    """Serialize a table to an in-memory Parquet file for a BigQuery load job."""
+    buf = io.BytesIO()
+    # BigQuery stores microseconds; some source years carry nanosecond timestamps
+    pq.write_table(table, buf, coerce_timestamps="us", allow_truncated_timestamps=True)
+    buf.seek(0)
+    return buf
+
+
+def file_sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(8 * 1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def run_load_job(client: bigquery.Client, buf: io.BytesIO, job_id: str) -> str:
+    """Append a Parquet payload under a deterministic job id; returns the id used.
+
+    A Conflict means a job with this id already exists, i.e. an earlier run
+    submitted this row group and crashed before journaling it. If that job
+    succeeded the row group is already in the table; if it failed, the
+    next suffixed id is tried.
+    """
+    job_config = bigquery.LoadJobConfig(
+        source_format=bigquery.SourceFormat.PARQUET,
+        write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+    )
+    for attempt in range(MAX_RETRIES):
+        attempt_id = job_id if attempt == 0 else f"{job_id}_r{attempt}"
         try:
-            print(f"  Downloading {key}...", end=" ", flush=True)
-            df = pd.read_parquet(url)
-            print(f"{len(df)} rows", flush=True)
-
-            # Rename datetime columns
-            df = df.rename(columns={pickup_col: "pickup_datetime", dropoff_col: "dropoff_datetime"})
-
-            # Keep only needed columns
-            df = df[[c for c in KEEP_COLS_SOURCE if c in df.columns]]
-
-            # Rename camelCase to snake_case
-            df = df.rename(columns=COLUMN_RENAME)
-
-            # Strip timezone info
-            for col in df.select_dtypes(include=["datetimetz"]).columns:
-                df[col] = df[col].dt.tz_localize(None)
-
-            # Add metadata columns
-            df["taxi_type"] = taxi_type
-            df["extracted_at"] = datetime.now(timezone.utc).replace(tzinfo=None)
-
-            # Fix integer columns (NaN -> nullable Int64, then to float for BQ compatibility)
-            # BigQuery INTEGER columns accept int values; NaN rows will be NULL
-            for col in INT_COLS:
-                if col in df.columns:
-                    df[col] = df[col].astype("Int64")
-
-            # Upload to BigQuery
-            print(f"  Uploading {key} ({len(df)} rows)...", end=" ", flush=True)
-            job_config = bigquery.LoadJobConfig(
-                write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
-                # Let BigQuery auto-detect schema matching since table exists
+            job = client.load_table_from_file(
+                buf, FULL_TABLE_ID, job_id=attempt_id, job_config=job_config, rewind=True
             )
+        except Conflict:
+            job = client.get_job(attempt_id)
+            if job.state == "DONE" and job.error_result:
+                continue
+            print(f"  {attempt_id} was already submitted by an earlier run, reusing it", flush=True)
+        job.result()  # Wait for completion
+        return attempt_id
+    raise RuntimeError(f"All {MAX_RETRIES} load job ids for {job_id} are taken by failed jobs")
+
+
+def load_month(client: bigquery.Client, year: int, month: int, taxi_type: str,
+               journal: CheckpointJournal) -> int:
+    """Load one month row group by row group, skipping groups the journal has committed.
+
+    Returns the number of rows uploaded by this call. Raises on failure; a
+    retry resumes at the first uncommitted row group.
+    """
+    key = f"{taxi_type}-{year}-{month:02d}"
+    url = f"https://d37ci6vzurychx.cloudfront.net/trip-data/{taxi_type}_tripdata_{year}-{month:02d}.parquet"
+
+    print(f"  Downloading {key}...", flush=True)
+    path = tlc_cache.fetch(url)
+    pf = pq.ParquetFile(path)
+    sha256 = file_sha256(path)
+    print(f"  {key}: {pf.metadata.num_rows} rows in {pf.num_row_groups} row groups", flush=True)
+
+    committed = journal.start_file(key, url, sha256, pf.num_row_groups, pf.metadata.num_rows)
+    if committed:
+        print(f"  {key}: resuming, {len(committed)}/{pf.num_row_groups} row groups already loaded")
+
+    projection = arrow_projection(pf.schema_arrow.names, taxi_type)
+    extracted_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    row_count = 0
 
-            job = client.load_table_from_dataframe(df, FULL_TABLE_ID, job_config=job_config)
-            job.result()  # Wait for completion
+    for i in range(pf.num_row_groups):
+        if i in committed:
+            continue
+        t0 = time.time()
+        table = finish_arrow(
+            pf.read_row_group(i, columns=list(projection.values())), projection, taxi_type, extracted_at
+        )
 
-            row_count = len(df)
-            print(f"OK ({row_count} rows uploaded)", flush=True)
+        # Upload to BigQuery as Parquet; columns are matched to the existing table by name
+        print(f"  Uploading {key} row group {i + 1}/{pf.num_row_groups} ({table.num_rows} rows)...", flush=True)
+        buf = to_parquet_buffer(table)
+        checksum = f"{zlib.crc32(buf.getbuffer()):08x}"
+        job_id = run_load_job(client, buf, f"load_trips_{key}_rg{i:03d}_{sha256[:12]}")
 
-            # Free memory
-            del df
+        journal.commit_row_group(key, i, table.num_rows, checksum, job_id, time.time() - t0)
+        row_count += table.num_rows
+
+    journal.finish_file(key)
+    print(f"  {key}: OK ({row_count} rows uploaded)", flush=True)
+    return row_count
+
+
+def fetch_and_upload_month(client: bigquery.Client, year: int, month: int,
+                           taxi_type: str, completed: set, journal: CheckpointJournal) -> int:
+    """Download one month of data and upload to BigQuery. Returns row count."""
+    key = f"{taxi_type}-{year}-{month:02d}"
+    if key in completed:
+        print(f"  SKIP {key} (already loaded)")
+        return 0
+
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            row_count = load_month(client, year, month, taxi_type, journal)
 
             # Mark as completed
             completed.add(key)
@@ -133,7 +315,7 @@ def fetch_and_upload_month(client: bigquery.Client, year: int, month: int,
             return row_count
 
         except Exception as e:
-            if ("403" in str(e) or "429" in str(e)) and attempt < MAX_RETRIES:
+            if is_rate_limited(e) and attempt < MAX_RETRIES:
                 wait = RETRY_BASE_WAIT * attempt
                 print(f"\n  Rate limited on {key}, waiting {wait}s (attempt {attempt}/{MAX_RETRIES})...")
                 time.sleep(wait)
@@ -146,7 +328,154 @@ def fetch_and_upload_month(client: bigquery.Client, year: int, month: int,
     return 0
 
 
+class AIMDLimiter:
+    """Concurrency limit with additive increase and multiplicative decrease.
+
+    Each success adds 1/limit to the limit (about one slot per round of
+    successes); each throttled request halves it. Workers block in acquire()
+    while the number of active loads is at the limit.
+    """
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.active = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+
+    def release(self, throttled: bool = False):
+        with self._cond:
+            self.active -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit / 2)
+                print(f"  Throttled: concurrency limit down to {int(self.limit)}")
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+def backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt))."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+class WorkerStats:
+    """Files, rows and busy seconds per worker thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.by_worker = {}
+
+    def record(self, rows: int, seconds: float):
+        name = threading.current_thread().name
+        with self._lock:
+            files, total_rows, busy = self.by_worker.get(name, (0, 0, 0.0))
+            self.by_worker[name] = (files + 1, total_rows + rows, busy + seconds)
+
+    def report(self):
+        for name, (files, rows, busy) in sorted(self.by_worker.items()):
+            print(f"  {name}: {files} files, {rows:,} rows, {rows / busy if busy else 0:,.0f} rows/sec")
+
+
+def backfill_month(client: bigquery.Client, year: int, month: int, taxi_type: str,
+                   completed: set, progress_lock: threading.Lock,
+                   limiter: AIMDLimiter, stats: WorkerStats, journal: CheckpointJournal) -> int:
+    """Concurrent-mode counterpart of fetch_and_upload_month."""
+    key = f"{taxi_type}-{year}-{month:02d}"
+    if key in completed:
+        print(f"  SKIP {key} (already loaded)")
+        return 0
+
+    for attempt in range(1, MAX_RETRIES + 1):
+        limiter.acquire()
+        throttled = False
+        t0 = time.time()
+        try:
+            row_count = load_month(client, year, month, taxi_type, journal)
+        except Exception as e:
+            throttled = is_rate_limited(e)
+            if not throttled or attempt == MAX_RETRIES:
+                print(f"  FAILED {key}: {e}")
+                return 0
+            wait = backoff(attempt)
+            print(f"  Rate limited on {key}, retrying in {wait:.0f}s (attempt {attempt}/{MAX_RETRIES})")
+        else:
+            stats.record(row_count, time.time() - t0)
+            with progress_lock:
+                completed.add(key)
+                save_progress(completed)
+            return row_count
+        finally:
+            limiter.release(throttled)
+
+        time.sleep(wait)
+
+    return 0
+
+
+def run_concurrent(client: bigquery.Client, completed: set, journal: CheckpointJournal,
+                   initial_workers: int, max_workers: int) -> tuple:
+    """Load every pending (month, taxi type) on a bounded pool gated by an AIMD limiter."""
+    limiter = AIMDLimiter(initial_workers, max_workers)
+    stats = WorkerStats()
+    progress_lock = threading.Lock()
+    jobs = [(year, month, taxi_type) for year, month in iter_months() for taxi_type in TAXI_TYPES]
+
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="month") as executor:
+        rows = list(executor.map(
+            lambda job: backfill_month(client, *job, completed, progress_lock, limiter, stats, journal),
+            jobs,
+        ))
+    elapsed = time.time() - t0
+
+    total_rows = sum(rows)
+    print()
+    print("Per-worker throughput:")
+    stats.report()
+    print(f"  overall: {total_rows / elapsed if elapsed else 0:,.0f} rows/sec, "
+          f"final concurrency limit {int(limiter.limit)}")
+    return total_rows, sum(1 for r in rows if r > 0)
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Load NYC TLC taxi data into BigQuery month by month")
+    parser.add_argument("command", nargs="?", choices=["load", "status", "forget"], default="load",
+                        help="load (default) runs the backfill; status summarizes the checkpoint journal; "
+                             "forget KEY... drops files from the journal so they load again")
+    parser.add_argument("keys", nargs="*", help="File keys for forget, e.g. yellow-2019-01")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="Load several months at once with an adaptive (AIMD) concurrency limit")
+    parser.add_argument("--initial-workers", type=int, default=INITIAL_WORKERS,
+                        help="Starting concurrency limit in concurrent mode")
+    parser.add_argument("--max-workers", type=int, default=MAX_WORKERS,
+                        help="Upper bound on months loading at once in concurrent mode")
+    args = parser.parse_args()
+
+    # Files finished before the journal existed only appear in the progress file
+    journal = CheckpointJournal()
+    journal.import_completed(load_progress())
+
+    if args.command == "forget":
+        # Only after the month's rows were deleted from the table, or they load twice
+        completed = load_progress()
+        for key in args.keys:
+            removed = journal.forget(key)
+            completed.discard(key)
+            print(f"Forgot {key} ({removed} committed row groups)")
+        save_progress(completed)
+        return
+
+    if args.command == "status":
+        journal.status(f"{taxi_type}-{year}-{month:02d}"
+                       for year, month in iter_months() for taxi_type in TAXI_TYPES)
+        return
+
     print(f"=== NYC TLC Taxi Data Loader ===")
     print(f"Target: {FULL_TABLE_ID}")
     print(f"Range: {START_YEAR}-{START_MONTH:02d} to {END_YEAR}-{END_MONTH:02d}")
@@ -159,7 +488,7 @@ def main():
     print(f"Current table rows: {table.num_rows}")
     print()
 
-    completed = load_progress()
+    completed = load_progress() | journal.completed_keys()
     if completed:
         print(f"Resuming: {len(completed)} files already loaded")
         print()
@@ -167,25 +496,20 @@ def main():
     total_rows = 0
     total_files = 0
 
-    year, month = START_YEAR, START_MONTH
-    while (year, month) <= (END_YEAR, END_MONTH):
-        print(f"--- {year}-{month:02d} ---")
-
-        for taxi_type in TAXI_TYPES:
-            rows = fetch_and_upload_month(client, year, month, taxi_type, completed)
-            total_rows += rows
-            if rows > 0:
-                total_files += 1
+    if args.concurrent:
+        total_rows, total_files = run_concurrent(client, completed, journal, args.initial_workers, args.max_workers)
+    else:
+        for year, month in iter_months():
+            print(f"--- {year}-{month:02d} ---")
 
-        print(f"  Month done. Running total: {total_rows:,} rows from {total_files} files")
-        time.sleep(COOLDOWN_BETWEEN_MONTHS)
+            for taxi_type in TAXI_TYPES:
+                rows = fetch_and_upload_month(client, year, month, taxi_type, completed, journal)
+                total_rows += rows
+                if rows > 0:
+                    total_files += 1
 
-        # Advance to next month
-        if month == 12:
-            year += 1
-            month = 1
-        else:
-            month += 1
+            print(f"  Month done. Running total: {total_rows:,} rows from {total_files} files")
+            time.sleep(COOLDOWN_BETWEEN_MONTHS)
 
     # Final count
     table = client.get_table(FULL_TABLE_ID)
@@ -56,17 +56,89 @@ columns:
 @bruin"""
 
 import os
+import sys
 import json
 import time
 import pandas as pd
 from datetime import datetime
+from pathlib import Path
+
+# tlc_cache lives in homework/shared, found by walking up from this file.
+# Bruin may run the asset from a copy outside the repo; set TLC_SHARED_DIR then.
+if "TLC_SHARED_DIR" in os.environ:
+    SHARED_DIR = Path(os.environ["TLC_SHARED_DIR"])
+else:
+    SHARED_DIR = next((p / "shared" for p in Path(__file__).resolve().parents
+                       if (p / "shared" / "tlc_cache.py").is_file()), None)
+if SHARED_DIR is None or not (SHARED_DIR / "tlc_cache.py").is_file():
+    raise ImportError(f"tlc_cache.py not found (looked in {SHARED_DIR or 'the parents of ' + __file__}); "
+                      "set TLC_SHARED_DIR to the repo's homework/shared directory")
+sys.path.insert(0, str(SHARED_DIR))
+import tlc_cache
 
 MAX_DATA_DATE = datetime(2025, 11, 30)
 MAX_RETRIES = 5
 RETRY_BASE_WAIT = 30
 
 
+def fetch_month(taxi_type, year, month):
+    """Download and clean one month of one taxi type. Returns None if it was skipped."""
+    url = f"https://d37ci6vzurychx.cloudfront.net/trip-data/{taxi_type}_tripdata_{year}-{month:02d}.parquet"
+
+    if taxi_type == "yellow":
+        pickup_col = "tpep_pickup_datetime"
+        dropoff_col = "tpep_dropoff_datetime"
+    else:
+        pickup_col = "lpep_pickup_datetime"
+        dropoff_col = "lpep_dropoff_datetime"
+
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            df = pd.read_parquet(tlc_cache.fetch(url))
+
+            df = df.rename(columns={
+                pickup_col: "pickup_datetime",
+                dropoff_col: "dropoff_datetime",
+            })
+
+            keep_cols = [
+                "VendorID", "pickup_datetime", "dropoff_datetime",
+                "passenger_count", "trip_distance",
+                "PULocationID", "DOLocationID", "payment_type",
+                "fare_amount", "tip_amount", "total_amount",
+            ]
+            df = df[[c for c in keep_cols if c in df.columns]]
+
+            # Strip timezone info for clean loading
+            for col in df.select_dtypes(include=["datetimetz"]).columns:
+                df[col] = df[col].dt.tz_localize(None)
+
+            df["taxi_type"] = taxi_type
+            df["extracted_at"] = datetime.utcnow()
+
+            # Ensure integer columns stay as nullable integers (not float from NaN)
+            for col in ["VendorID", "PULocationID", "DOLocationID", "payment_type"]:
+                if col in df.columns:
+                    df[col] = df[col].astype("Int64")
+
+            return df
+        except Exception as e:
+            if ("403" in str(e) or "429" in str(e)) and attempt < MAX_RETRIES:
+                wait = RETRY_BASE_WAIT * attempt
+                print(f"Rate limited on {taxi_type} {year}-{month:02d}, waiting {wait}s (attempt {attempt}/{MAX_RETRIES})...")
+                time.sleep(wait)
+            else:
+                print(f"Skipping {taxi_type} {year}-{month:02d}: {e}")
+                return None
+
+
 def materialize():
+    """Yield one DataFrame per month and taxi type.
+
+    Bruin appends each batch before asking for the next one, so only a
+    single month is held in memory at a time instead of the whole
+    BRUIN_START_DATE..BRUIN_END_DATE range.
+    """
     start_date = os.environ.get("BRUIN_START_DATE", "2022-01-01")
     end_date = os.environ.get("BRUIN_END_DATE", "2022-02-01")
 
@@ -80,7 +152,8 @@ def materialize():
         print(f"Capping end date from {end_date} to {MAX_DATA_DATE.strftime('%Y-%m-%d')} (NYC TLC data limit)")
         end = MAX_DATA_DATE
 
-    all_frames = []
+    total_rows = 0
+    batches = 0
 
     current = start
     while current < end:
@@ -88,51 +161,22 @@ def materialize():
         month = current.month
 
         for taxi_type in taxi_types:
-            url = f"https://d37ci6vzurychx.cloudfront.net/trip-data/{taxi_type}_tripdata_{year}-{month:02d}.parquet"
-
-            if taxi_type == "yellow":
-                pickup_col = "tpep_pickup_datetime"
-                dropoff_col = "tpep_dropoff_datetime"
-            else:
-                pickup_col = "lpep_pickup_datetime"
-                dropoff_col = "lpep_dropoff_datetime"
-
-            for attempt in range(1, MAX_RETRIES + 1):
-                try:
-                    df = pd.read_parquet(url)
-
-                    df = df.rename(columns={
-                        pickup_col: "pickup_datetime",
-                        dropoff_col: "dropoff_datetime",
-                    })
-
-                    keep_cols = [
-                        "VendorID", "pickup_datetime", "dropoff_datetime",
-                        "passenger_count", "trip_distance",
-                        "PULocationID", "DOLocationID", "payment_type",
-                        "fare_amount", "tip_amount", "total_amount",
-                    ]
-                    df = df[[c for c in keep_cols if c in df.columns]]
-
-                    # Strip timezone info for clean loading
-                    for col in df.select_dtypes(include=["datetimetz"]).columns:
-                        df[col] = df[col].dt.tz_localize(None)
-
-                    df["taxi_type"] = taxi_type
-                    df["extracted_at"] = datetime.utcnow()
-
-                    all_frames.append(df)
-                    print(f"Fetched {len(df)} rows for {taxi_type} {year}-{month:02d}")
-                    time.sleep(5)
-                    break
-                except Exception as e:
-                    if ("403" in str(e) or "429" in str(e)) and attempt < MAX_RETRIES:
-                        wait = RETRY_BASE_WAIT * attempt
-                        print(f"Rate limited on {taxi_type} {year}-{month:02d}, waiting {wait}s (attempt {attempt}/{MAX_RETRIES})...")
-                        time.sleep(wait)
-                    else:
-                        print(f"Skipping {taxi_type} {year}-{month:02d}: {e}")
-                        break
+            t0 = time.time()
+            df = fetch_month(taxi_type, year, month)
+            if df is None:
+                continue
+            fetch_secs = time.time() - t0
+            rows = len(df)
+
+            t0 = time.time()
+            yield df
+            # Control comes back once Bruin has written the batch
+            del df
+            total_rows += rows
+            batches += 1
+            print(f"Batch {batches}: {taxi_type} {year}-{month:02d}, {rows} rows "
+                  f"(fetch {fetch_secs:.1f}s, append {time.time() - t0:.1f}s)")
+            time.sleep(5)
 
         print(f"--- Finished {year}-{month:02d}, cooling down 10s ---")
         time.sleep(10)
@@ -142,16 +186,7 @@ def materialize():
         else:
             current = current.replace(month=month + 1)
 
-    if all_frames:
-        result = pd.concat(all_frames, ignore_index=True)
-
-        # Ensure integer columns stay as nullable integers (not float from NaN)
-        for col in ["VendorID", "PULocationID", "DOLocationID", "payment_type"]:
-            if col in result.columns:
-                result[col] = result[col].astype("Int64")
-
-        print(f"Total rows to ingest: {len(result)}")
-        return result
+    if batches:
+        print(f"Total rows ingested: {total_rows} in {batches} batches")
     else:
         print("No data fetched")
-        return pd.DataFrame()
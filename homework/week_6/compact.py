@@ -0,0 +1,168 @@
+"""Rewrite a Parquet directory into files of a target size.
+
+A fixed repartition(4) (notebook Q2) gives files whose size depends on the
+month's volume: tiny files for a small month, huge ones for a big month.
+This tool reads the input's footers (total bytes, rows, row groups) and
+derives the output file count from --target-mb. It then rewrites the data
+with repartition(n), so the files come out evenly sized, and sets the row
+group size with parquet.block.size. A round-robin repartition scatters rows,
+so give --sort-by with the columns the input was clustered on (trip_lake.py
+sorts by PULocationID): the rows are then range-partitioned and sorted on
+them, and row-group min/max stats stay selective.
+
+The rewrite is checked before anything is replaced. The row count and an
+order-independent content hash (the sum of xxhash64 over every column) must
+match the input. With --in-place the checked output then takes the input's
+place. Finally the tool prints the file size distribution before and after,
+and the best-of-N time of a full scan on each.
+
+Only flat (unpartitioned) directories are handled. Compact a partitioned
+lake one partition directory at a time. For a key=value directory the
+scratch output and backup go next to the table root rather than inside it,
+where Spark would discover them as extra partition values.
+
+    python compact.py yellow_2025_11_repartitioned --target-mb 64
+    python compact.py yellow_2025_11_repartitioned --target-mb 16 --row-group-mb 8 --in-place
+    python compact.py yellow_lake/pickup_date=2025-11-15 --target-mb 16 --sort-by PULocationID --in-place
+"""
+
+import argparse
+import math
+import shutil
+import statistics
+from pathlib import Path
+
+import pyarrow.parquet as pq
+from pyspark.sql import functions as F
+
+from spark_common import get_spark, parquet_files, timed
+
+MB = 1024 * 1024
+
+
+def layout(path):
+    """Per-file (bytes, rows, row groups) read from the Parquet footers."""
+    stats = []
+    for file in sorted(parquet_files(path)):
+        meta = pq.ParquetFile(file).metadata
+        stats.append((file.stat().st_size, meta.num_rows, meta.num_row_groups))
+    return stats
+
+
+def describe(label, stats):
+    sizes = [size / MB for size, _, _ in stats]
+    rows = sum(r for _, r, _ in stats)
+    groups = sum(g for _, _, g in stats)
+    print(f"{label:<7} {len(sizes):>5} files  {sum(sizes):>8.1f} MB total  "
+          f"min {min(sizes):>7.2f}  median {statistics.median(sizes):>7.2f}  max {max(sizes):>7.2f} MB  "
+          f"{rows:,} rows in {groups} row groups")
+
+
+def output_file_count(stats, target_mb):
+    return max(1, math.ceil(sum(size for size, _, _ in stats) / (target_mb * MB)))
+
+
+def table_root(path):
+    """The directory above any key=value partition directories in path."""
+    root = Path(path).resolve()
+    while "=" in root.name:
+        root = root.parent
+    return root
+
+
+def sibling_path(path, suffix):
+    """<path><suffix>, moved next to the table root when path is a partition directory."""
+    path = Path(path.rstrip("/"))
+    root = table_root(path)
+    if root == path.resolve():
+        return f"{path}{suffix}"
+    partition = path.resolve().relative_to(root)
+    return str(root.parent / f"{root.name}_{'_'.join(partition.parts).replace('=', '-')}{suffix}")
+
+
+def fingerprint(df):
+    """(rows, sum of per-row xxhash64) - equal for the same rows in any order or file split."""
+    row_hash = F.xxhash64(*[F.col(f"`{name}`") for name in df.columns]).cast("decimal(38,0)")
+    row = df.agg(F.count(F.lit(1)), F.sum(row_hash)).first()
+    return row[0], row[1]
+
+
+def full_scan(df):
+    return df.agg(*[F.count(F.col(f"`{name}`")) for name in df.columns]).first()
+
+
+def compact(spark, input_path, output_path, target_mb, row_group_mb, sort_by=None):
+    before = layout(input_path)
+    if not before:
+        raise SystemExit(f"No Parquet files under {input_path}")
+    if any(file.parent != Path(input_path) for file in parquet_files(input_path)):
+        raise SystemExit(f"{input_path} is partitioned; compact each partition directory instead")
+
+    files = output_file_count(before, target_mb)
+    print(f"Rewriting {input_path} into {files} files of ~{target_mb} MB "
+          f"with {row_group_mb} MB row groups -> {output_path}")
+
+    df = spark.read.parquet(input_path)
+    if sort_by:
+        rewritten = df.repartitionByRange(files, *sort_by).sortWithinPartitions(*sort_by)
+    else:
+        rewritten = df.repartition(files)
+    rewritten \
+        .write \
+        .mode("overwrite") \
+        .option("parquet.block.size", row_group_mb * MB) \
+        .parquet(output_path)
+
+    expected = fingerprint(df)
+    actual = fingerprint(spark.read.parquet(output_path))
+    if actual != expected:
+        shutil.rmtree(output_path)
+        raise SystemExit(f"Compacted data differs from the input (rows, hash): {actual} != {expected}")
+    print(f"Verified {actual[0]:,} rows, content hash {actual[1]}")
+    return before, layout(output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact a Parquet directory to a target file size")
+    parser.add_argument("input")
+    parser.add_argument("--target-mb", type=int, default=128, help="Target size of each output file")
+    parser.add_argument("--row-group-mb", type=int, default=None,
+                        help="Parquet row group size (default: the target size, at most 128 MB)")
+    parser.add_argument("--sort-by", nargs="+", default=None,
+                        help="Columns the input is clustered on, kept sorted in the output (e.g. PULocationID)")
+    parser.add_argument("--output", default=None,
+                        help="Default: <input>_compacted, next to the table root for a partition directory")
+    parser.add_argument("--in-place", action="store_true", help="Replace the input once the output is verified")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scan timing; the best is reported")
+    args = parser.parse_args()
+
+    output = args.output or sibling_path(args.input, "_compacted")
+    if Path(output).resolve() == Path(args.input).resolve():
+        raise SystemExit("--output must differ from the input; use --in-place to replace it")
+    root = table_root(args.input)
+    if root != Path(args.input).resolve() and root in Path(output).resolve().parents:
+        raise SystemExit(f"--output must be outside the partitioned table {root}")
+    row_group_mb = args.row_group_mb or min(args.target_mb, 128)
+
+    spark = get_spark("compact")
+    before, after = compact(spark, args.input, output, args.target_mb, row_group_mb, args.sort_by)
+
+    describe("before", before)
+    describe("after", after)
+
+    before_secs, _ = timed(lambda: full_scan(spark.read.parquet(args.input)), args.repeat)
+    after_secs, _ = timed(lambda: full_scan(spark.read.parquet(output)), args.repeat)
+    print(f"Full scan: {before_secs:.2f}s before, {after_secs:.2f}s after ({before_secs / after_secs:.1f}x)")
+
+    if args.in_place:
+        backup = sibling_path(args.input, "_precompact")
+        shutil.move(args.input, backup)
+        shutil.move(output, args.input)
+        shutil.rmtree(backup)
+        print(f"Replaced {args.input}")
+
+    spark.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Shared pieces for the week_6 Spark job modules.
+
+A local Spark session, the TLC input files through the shared download
+cache (homework/shared/tlc_cache.py) and a small timing helper. On Windows,
+run the notebook's first cell (or set HADOOP_HOME) before starting Spark.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "shared"))
+
+from pyspark.sql import SparkSession
+from pyspark.sql import functions as F
+
+import tlc_cache
+
+TRIP_URL = "https://d37ci6vzurychx.cloudfront.net/trip-data/yellow_tripdata_{year}-{month:02d}.parquet"
+ZONE_URL = "https://d37ci6vzurychx.cloudfront.net/misc/taxi_zone_lookup.csv"
+
+
+def get_spark(app_name, master="local[*]"):
+    return SparkSession.builder \
+        .master(master) \
+        .appName(app_name) \
+        .getOrCreate()
+
+
+def parse_month(value):
+    """'2025-11' -> (2025, 11), for argparse type=."""
+    year, month = value.split("-")
+    return int(year), int(month)
+
+
+def trip_file(year, month):
+    """Local path of a yellow trip month, downloaded once into the shared cache."""
+    return str(tlc_cache.fetch(TRIP_URL.format(year=year, month=month)))
+
+
+def zone_file():
+    return str(tlc_cache.fetch(ZONE_URL))
+
+
+def month_bounds(year, month):
+    """[first day of the month, first day of the next month) as timestamp literals."""
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return F.lit(f"{year}-{month:02d}-01").cast("timestamp"), \
+        F.lit(f"{next_year}-{next_month:02d}-01").cast("timestamp")
+
+
+def read_trip_months(spark, months, own_days_only=False):
+    """The yellow trip files for months [(year, month), ...] as one DataFrame.
+
+    TLC month files also hold trips picked up before the month (late-night
+    pickups on the previous month's last day, bogus years). With
+    own_days_only=True those rows are dropped, so each month covers only
+    its own days.
+    """
+    trips = None
+    for year, month in months:
+        df = spark.read.parquet(trip_file(year, month))
+        if own_days_only:
+            start, end = month_bounds(year, month)
+            df = df.filter((F.col("tpep_pickup_datetime") >= start) & (F.col("tpep_pickup_datetime") < end))
+        trips = df if trips is None else trips.unionByName(df, allowMissingColumns=True)
+    return trips
+
+
+def parquet_files(path):
+    """Data files under a Parquet directory, partition subdirectories included."""
+    return [p for p in Path(path).rglob("*.parquet") if p.is_file()]
+
+
+def timed(action, repeat=3):
+    """Run action() `repeat` times; returns (best seconds, last result)."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = action()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
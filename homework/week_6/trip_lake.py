@@ -0,0 +1,149 @@
+"""Write yellow trip months as a date-partitioned Parquet lake and benchmark it.
+
+The notebook writes November 2025 with repartition(4), so every query that
+filters on a day still reads the whole month. This job writes one Hive-style
+directory per pickup date (pickup_date=2025-11-15/), with each day's rows
+sorted by PULocationID:
+
+- a filter on pickup_date prunes whole directories before any file is opened
+- within a file, PULocationID runs are contiguous, so row-group min/max
+  stats let Parquet skip row groups for a zone filter
+
+Rows are repartitioned by pickup_date, so each day ends up in one task and
+one file. Partition overwrite is dynamic, and each month file is first cut
+to pickups within that month (TLC files also carry stray earlier pickups),
+so writing 2025-12 after 2025-11 only writes December's dates and never
+replaces a November partition. The stray rows are not in the lake; the
+benchmark baseline is written with the same cut so both layouts hold the
+same trips.
+
+    python trip_lake.py write --months 2025-11
+    python trip_lake.py bench --months 2025-11
+    python trip_lake.py bench --months 2025-12 --bench-date 2025-12-24
+
+Q3 counts the trips of one date, by default the 15th of the first --months
+entry; --bench-date must fall in one of the months.
+"""
+
+import argparse
+import datetime
+
+from pyspark.sql import functions as F
+
+from spark_common import get_spark, parquet_files, parse_month, read_trip_months, timed, zone_file
+
+LAKE_PATH = "yellow_lake"
+BASELINE_PATH = "yellow_bench_unpartitioned"
+BENCH_DAY = 15
+BENCH_ZONE = 1
+
+
+def write_lake(spark, months, lake_path=LAKE_PATH, row_group_mb=4):
+    spark.conf.set("spark.sql.sources.partitionOverwriteMode", "dynamic")
+    trips = read_trip_months(spark, months, own_days_only=True).withColumn("pickup_date", F.to_date("tpep_pickup_datetime"))
+
+    # Sorting by the partition column first satisfies the writer's own ordering
+    # requirement, so it does not re-sort each task and lose the PULocationID order
+    trips \
+        .repartition("pickup_date") \
+        .sortWithinPartitions("pickup_date", "PULocationID") \
+        .write \
+        .mode("overwrite") \
+        .option("parquet.block.size", row_group_mb * 1024 * 1024) \
+        .partitionBy("pickup_date") \
+        .parquet(lake_path)
+
+
+def write_baseline(spark, months, baseline_path=BASELINE_PATH):
+    """The notebook's Q2 layout (4 unpartitioned files) over the same trips as the lake."""
+    read_trip_months(spark, months, own_days_only=True).repartition(4).write.mode("overwrite").parquet(baseline_path)
+
+
+# name -> (query on the unpartitioned layout, query on the lake)
+def bench_date(months, date=None):
+    """The Q3 date: `date` if it falls in one of months, else the BENCH_DAY of the first month."""
+    if date is None:
+        year, month = months[0]
+        return f"{year}-{month:02d}-{BENCH_DAY:02d}"
+    day = datetime.date.fromisoformat(date)
+    if (day.year, day.month) not in months:
+        raise SystemExit(f"--bench-date {date} is outside --months")
+    return day.isoformat()
+
+
+def bench_queries(spark, date):
+    zones = spark.read.option("header", "true").csv(zone_file())
+
+    def q4(df):
+        duration = (F.unix_timestamp("tpep_dropoff_datetime") - F.unix_timestamp("tpep_pickup_datetime")) / 3600
+        return df.select(F.max(duration)).collect()[0][0]
+
+    def q6(df):
+        return df.join(zones, df.PULocationID == zones.LocationID) \
+            .groupBy("Zone").count() \
+            .orderBy("count", "Zone").first()["Zone"]
+
+    return {
+        "Q3 trips on one day": (
+            lambda df: df.filter(F.to_date("tpep_pickup_datetime") == date).count(),
+            lambda df: df.filter(F.col("pickup_date") == date).count(),
+        ),
+        "Q4 longest trip": (q4, q4),
+        "Q6 least frequent zone": (q6, q6),
+        "trips from one zone": (
+            lambda df: df.filter(F.col("PULocationID") == BENCH_ZONE).count(),
+            lambda df: df.filter(F.col("PULocationID") == BENCH_ZONE).count(),
+        ),
+    }
+
+
+def bench(spark, baseline_path, lake_path, repeat, date):
+    baseline = spark.read.parquet(baseline_path)
+    lake = spark.read.parquet(lake_path)
+    print(f"unpartitioned: {len(parquet_files(baseline_path))} files, "
+          f"lake: {len(parquet_files(lake_path))} files in {lake.select('pickup_date').distinct().count()} dates")
+
+    print(f"\n{'query':<24} {'unpartitioned':>13} {'lake':>8} {'speedup':>8}  result")
+    for name, (on_baseline, on_lake) in bench_queries(spark, date).items():
+        base_secs, base_result = timed(lambda: on_baseline(baseline), repeat)
+        lake_secs, lake_result = timed(lambda: on_lake(lake), repeat)
+        match = "" if base_result == lake_result else f"  MISMATCH (unpartitioned: {base_result})"
+        print(f"{name:<24} {base_secs:>12.2f}s {lake_secs:>7.2f}s {base_secs / lake_secs:>7.1f}x  {lake_result}{match}")
+
+    print(f"\nQ3 plan on the lake for {date} (PartitionFilters prunes the other dates):")
+    lake.filter(F.col("pickup_date") == date).groupBy().count().explain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Date-partitioned yellow trip lake")
+    parser.add_argument("command", choices=["write", "bench"])
+    parser.add_argument("--months", type=parse_month, nargs="+", default=[(2025, 11)],
+                        help="Months to write, as YYYY-MM")
+    parser.add_argument("--lake", default=LAKE_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH,
+                        help="Unpartitioned layout to compare against; written from --months if missing")
+    parser.add_argument("--row-group-mb", type=int, default=4,
+                        help="Parquet row group size; smaller groups make zone filters more selective")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per query; the best is reported")
+    parser.add_argument("--bench-date", default=None,
+                        help=f"Date for Q3, as YYYY-MM-DD in one of --months (default: day {BENCH_DAY} of the first)")
+    args = parser.parse_args()
+    date = bench_date(args.months, args.bench_date)
+
+    spark = get_spark("trip_lake")
+
+    if args.command == "write":
+        write_lake(spark, args.months, args.lake, args.row_group_mb)
+        print(f"Wrote {len(parquet_files(args.lake))} files to {args.lake}")
+    else:
+        if not parquet_files(args.baseline):
+            write_baseline(spark, args.months, args.baseline)
+        if not parquet_files(args.lake):
+            write_lake(spark, args.months, args.lake, args.row_group_mb)
+        bench(spark, args.baseline, args.lake, args.repeat, date)
+
+    spark.stop()
+
+
+if __name__ == "__main__":
+    main()
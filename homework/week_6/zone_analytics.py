@@ -0,0 +1,131 @@
+"""Zone reports over yellow trips: aggregate first, then enrich with a broadcast lookup.
+
+The notebook's Q6 joins every trip to zones (read from CSV with every column
+a string, so the join key is cast on both sides) and only then groups by
+Zone. Here:
+
+- the zone lookup is read once with a typed schema and broadcast
+- trips are reduced to one row per PULocationID before the join, so the join
+  sees ~265 rows instead of millions
+- that per-location aggregate is cached and shared by every report
+
+Several LocationIDs share a Zone name (e.g. the three island zones), so the
+reports still group by Zone after enrichment, and the results match the
+naive query.
+
+    python zone_analytics.py --months 2025-11
+"""
+
+import argparse
+
+from pyspark.sql import functions as F
+from pyspark.sql.types import IntegerType, StringType, StructField, StructType
+
+from spark_common import get_spark, parse_month, read_trip_months, timed, zone_file
+
+ZONE_SCHEMA = StructType([
+    StructField("LocationID", IntegerType()),
+    StructField("Borough", StringType()),
+    StructField("Zone", StringType()),
+    StructField("service_zone", StringType()),
+])
+
+NAIVE_Q6 = """
+    SELECT z.Zone, COUNT(t.PULocationID) as trip_count
+    FROM yellow_taxi t
+    JOIN zones z ON t.PULocationID = z.LocationID
+    GROUP BY z.Zone
+    ORDER BY trip_count ASC, z.Zone
+    LIMIT 1
+"""
+
+
+def load_zones(spark):
+    return spark.read.option("header", "true").schema(ZONE_SCHEMA).csv(zone_file())
+
+
+class ZoneAnalytics:
+    """Per-location trip aggregate, computed once and cached, enriched with zone names."""
+
+    def __init__(self, trips, zones):
+        self.pickups = trips.groupBy("PULocationID").agg(
+            F.count("*").alias("trip_count"),
+            F.sum("total_amount").alias("total_amount"),
+            F.sum("trip_distance").alias("trip_distance"),
+        ).cache()
+        self.by_zone = self.pickups \
+            .join(F.broadcast(zones), self.pickups.PULocationID == zones.LocationID) \
+            .groupBy("Borough", "Zone") \
+            .agg(
+                F.sum("trip_count").alias("trip_count"),
+                F.sum("total_amount").alias("total_amount"),
+                F.sum("trip_distance").alias("trip_distance"),
+            )
+
+    def least_frequent_zone(self):
+        """Q6: the pickup Zone with the fewest trips."""
+        return self.by_zone.groupBy("Zone").agg(F.sum("trip_count").alias("trip_count")) \
+            .orderBy("trip_count", "Zone").first()
+
+    def top_zones(self, n=10):
+        return self.by_zone.orderBy(F.desc("trip_count"), "Zone").limit(n).collect()
+
+    def boroughs(self):
+        return self.by_zone.groupBy("Borough") \
+            .agg(F.sum("trip_count").alias("trip_count"),
+                 F.round(F.sum("total_amount") / F.sum("trip_count"), 2).alias("avg_total_amount")) \
+            .orderBy(F.desc("trip_count")).collect()
+
+    def release(self):
+        self.pickups.unpersist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zone reports: naive join vs aggregate-then-broadcast")
+    parser.add_argument("--months", type=parse_month, nargs="+", default=[(2025, 11)],
+                        help="Yellow trip months, as YYYY-MM")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per timing; the best is reported")
+    parser.add_argument("--explain", action="store_true", help="Print the formatted physical plans")
+    args = parser.parse_args()
+
+    spark = get_spark("zone_analytics")
+    trips = read_trip_months(spark, args.months)
+
+    # The notebook's version: string-typed zones, join every trip, then group
+    spark.read.option("header", "true").csv(zone_file()).createOrReplaceTempView("zones")
+    trips.createOrReplaceTempView("yellow_taxi")
+    naive = spark.sql(NAIVE_Q6)
+
+    analytics = ZoneAnalytics(trips, load_zones(spark))
+
+    if args.explain:
+        print("Naive Q6 plan:")
+        naive.explain(mode="formatted")
+        print("Aggregate-then-broadcast Q6 plan:")
+        analytics.by_zone.explain(mode="formatted")
+
+    naive_secs, naive_row = timed(lambda: naive.first(), args.repeat)
+
+    # The first report pays for the one scan that fills the cache; later ones reuse it
+    build_secs, q6_row = timed(analytics.least_frequent_zone, 1)
+    cached_secs, q6_row = timed(analytics.least_frequent_zone, args.repeat)
+    top_secs, top = timed(analytics.top_zones, args.repeat)
+    borough_secs, boroughs = timed(analytics.boroughs, args.repeat)
+
+    match = "same" if (naive_row["Zone"], naive_row["trip_count"]) == (q6_row["Zone"], q6_row["trip_count"]) else "DIFFERENT"
+    print(f"Q6 least frequent zone: {q6_row['Zone']} ({q6_row['trip_count']} trips), {match} as the naive query")
+    print(f"  naive join then group:        {naive_secs:.2f}s")
+    print(f"  aggregate + broadcast (cold): {build_secs:.2f}s")
+    print(f"  from the cached aggregate:    {cached_secs:.3f}s ({naive_secs / cached_secs:.0f}x)")
+    print(f"Top zones: {top_secs:.3f}s, boroughs: {borough_secs:.3f}s from the same cache")
+    for row in top[:5]:
+        print(f"  {row['Zone']:<40} {row['trip_count']:>10,}")
+    for row in boroughs:
+        print(f"  {row['Borough']:<40} {row['trip_count']:>10,}  avg total ${row['avg_total_amount']}")
+
+    analytics.release()
+    spark.stop()
+
+
+if __name__ == "__main__":
+    main()
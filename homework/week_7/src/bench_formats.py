@@ -0,0 +1,113 @@
+"""Compare the JSON and Avro wire formats for green-trips messages.
+
+Always measures bytes per message and encode/decode throughput in process.
+With --end-to-end it also produces every message to a scratch topic per
+format and consumes it back, timing the full round trip through Redpanda.
+
+    uv run src/bench_formats.py --rows 200000
+    uv run src/bench_formats.py --end-to-end
+"""
+
+import argparse
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / "producers"))
+sys.path.insert(0, str(Path(__file__).parent / "consumers"))
+
+from kafka import KafkaConsumer, KafkaProducer
+from kafka.admin import KafkaAdminClient, NewTopic
+
+from consumer import count_long_trips
+from producer import load_trips, serialize_records, server
+
+FORMATS = ['json', 'avro']
+
+
+def round_trip(payloads, wire_format, max_records=5000, timeout=120):
+    """Produce payloads to a fresh topic, consume them back; returns (seconds, long trips).
+
+    The scratch topic is created up front (the compose Redpanda does not
+    auto-create topics) and deleted afterwards. Raises TimeoutError if not
+    every message is read back within `timeout` seconds.
+    """
+    topic = f'green-trips-bench-{wire_format}-{uuid.uuid4().hex[:8]}'
+    admin = KafkaAdminClient(bootstrap_servers=[server])
+    admin.create_topics([NewTopic(topic, num_partitions=1, replication_factor=1)])
+    producer = consumer = None
+    try:
+        producer = KafkaProducer(bootstrap_servers=[server], linger_ms=20, batch_size=256 * 1024)
+        consumer = KafkaConsumer(
+            topic,
+            bootstrap_servers=[server],
+            auto_offset_reset='earliest',
+            enable_auto_commit=False,
+            group_id=None,
+            max_poll_records=max_records,
+        )
+
+        t0 = time.time()
+        for payload in payloads:
+            producer.send(topic, value=payload)
+        producer.flush()
+
+        received = 0
+        long_trips = 0
+        deadline = t0 + timeout
+        while received < len(payloads):
+            if time.time() > deadline:
+                raise TimeoutError(f'Read back {received}/{len(payloads)} messages from {topic} in {timeout}s')
+            for records in consumer.poll(timeout_ms=1000, max_records=max_records).values():
+                long_trips += count_long_trips([record.value for record in records], wire_format)
+                received += len(records)
+        elapsed = time.time() - t0
+    finally:
+        if producer is not None:
+            producer.close()
+        if consumer is not None:
+            consumer.close()
+        admin.delete_topics([topic])
+        admin.close()
+    return elapsed, long_trips
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON vs Avro for green-trips')
+    parser.add_argument('--rows', type=int, default=None, help='Use only the first N trips')
+    parser.add_argument('--end-to-end', action='store_true', help='Also round-trip through the broker')
+    parser.add_argument('--timeout', type=int, default=120, help='Max seconds per --end-to-end round trip')
+    args = parser.parse_args()
+
+    results = {}
+    for wire_format in FORMATS:
+        df = load_trips(wire_format)
+        if args.rows:
+            df = df.head(args.rows)
+
+        t0 = time.time()
+        payloads = serialize_records(df, wire_format)
+        encode_secs = time.time() - t0
+
+        t0 = time.time()
+        long_trips = count_long_trips(payloads, wire_format)
+        decode_secs = time.time() - t0
+
+        total_bytes = sum(len(p) for p in payloads)
+        results[wire_format] = total_bytes / len(payloads)
+        print(f"{wire_format:>4}: {len(payloads)} msgs, {total_bytes / len(payloads):.1f} bytes/msg, "
+              f"encode {len(payloads) / encode_secs:,.0f} msgs/sec, "
+              f"decode {len(payloads) / decode_secs:,.0f} msgs/sec, long trips {long_trips}")
+
+        if args.end_to_end:
+            elapsed, e2e_long_trips = round_trip(payloads, wire_format, timeout=args.timeout)
+            print(f"      end-to-end: {len(payloads) / elapsed:,.0f} msgs/sec, "
+                  f"{total_bytes / 1024 / 1024 / elapsed:.2f} MB/sec, long trips {e2e_long_trips}")
+
+    print(f"Avro messages are {results['json'] / results['avro']:.1f}x smaller than JSON")
+
+
+if __name__ == '__main__':
+    main()
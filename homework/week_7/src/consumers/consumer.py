@@ -1,38 +1,219 @@
+import argparse
+import io
 import json
+import multiprocessing as mp
+import queue
 import sys
+import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.json as pa_json
 from kafka import KafkaConsumer
 
+from schemas import avro_decode
+
 server = 'localhost:9092'
 topic_name = 'green-trips'
+group_id = 'green-trips-hw3'
+
+# Batch mode only parses the fields it aggregates; the rest of each message is skipped
+BATCH_SCHEMA = pa.schema([('trip_distance', pa.float64()), ('sent_at', pa.int64())])
+PARSE_OPTIONS = pa_json.ParseOptions(explicit_schema=BATCH_SCHEMA, unexpected_field_behavior='ignore')
+
+
+DESERIALIZERS = {
+    'json': lambda x: json.loads(x.decode('utf-8')),
+    'avro': avro_decode,
+}
+
+
+def consume_rows(group, wire_format='json'):
+    """Original path: one message and one deserializer call at a time."""
+    # Q3: Consumer to count trips with trip_distance > 5.0 km
+    consumer = KafkaConsumer(
+        topic_name,
+        bootstrap_servers=[server],
+        auto_offset_reset='earliest',
+        group_id=group,
+        consumer_timeout_ms=5000,
+        value_deserializer=DESERIALIZERS[wire_format]
+    )
+
+    print(f"Listening to {topic_name}...")
+
+    count = 0
+    long_trips = 0
+    latencies = []
+
+    for message in consumer:
+        trip = message.value
+        count += 1
+        if trip.get('sent_at') is not None:
+            latencies.append(now_ms() - trip['sent_at'])
+        if (trip.get('trip_distance') or 0) > 5.0:
+            long_trips += 1
+
+        if count % 10000 == 0:
+            print(f"Processed {count} messages, long trips (>5km): {long_trips}")
+
+    consumer.close()
+    print_latency(latencies)
+    return count, long_trips
+
+
+def now_ms():
+    return time.time_ns() // 1_000_000
+
+
+def print_latency(latencies):
+    """Producer-to-consumer latency percentiles from the producer's sent_at stamps."""
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"Send-to-arrival latency over {len(latencies)} messages: "
+              f"p50 {p50:.0f} ms, p95 {p95:.0f} ms, p99 {p99:.0f} ms")
+
+
+def decode_batch(values, wire_format='json'):
+    """Decode a batch of messages into trip_distance and sent_at columns at once."""
+    if wire_format == 'avro':
+        trips = [avro_decode(value) for value in values]
+        return pa.table({
+            'trip_distance': pa.array([t['trip_distance'] for t in trips], pa.float64()),
+            'sent_at': pa.array([t.get('sent_at') for t in trips], pa.int64()),
+        })
+    return pa_json.read_json(io.BytesIO(b'\n'.join(values)), parse_options=PARSE_OPTIONS)
+
+
+def long_trip_count(table):
+    distance = pc.fill_null(table['trip_distance'], 0.0)
+    return pc.sum(pc.greater(distance, 5.0)).as_py() or 0
+
+
+def count_long_trips(values, wire_format='json'):
+    """Count trip_distance > 5.0 in a batch of messages with a vectorized comparison."""
+    return long_trip_count(decode_batch(values, wire_format))
+
+
+def batch_worker(worker_id, group, max_records, report_interval, idle_timeout, wire_format, results):
+    """One consumer process in the group: poll batches, aggregate, commit per batch."""
+    consumer = KafkaConsumer(
+        topic_name,
+        bootstrap_servers=[server],
+        auto_offset_reset='earliest',
+        group_id=group,
+        enable_auto_commit=False,
+        max_poll_records=max_records,
+    )
+
+    count = 0
+    long_trips = 0
+    latencies = []
+    last_report = last_message = time.time()
+
+    while time.time() - last_message < idle_timeout:
+        batches = consumer.poll(timeout_ms=1000, max_records=max_records)
+        arrived_at = now_ms()
+        for records in batches.values():
+            table = decode_batch([record.value for record in records], wire_format)
+            long_trips += long_trip_count(table)
+            sent_at = table['sent_at'].drop_null().to_numpy()
+            if len(sent_at):
+                latencies.append(arrived_at - sent_at)
+            count += len(records)
+        if batches:
+            consumer.commit()
+            last_message = time.time()
+
+        if time.time() - last_report >= report_interval:
+            assignment = consumer.assignment()
+            end_offsets = consumer.end_offsets(list(assignment)) if assignment else {}
+            lag = sum(end - consumer.position(tp) for tp, end in end_offsets.items())
+            results.put(('progress', worker_id, count, long_trips, lag, None))
+            last_report = time.time()
+
+    consumer.close()
+    results.put(('done', worker_id, count, long_trips, 0,
+                 np.concatenate(latencies) if latencies else np.empty(0, dtype='int64')))
+
+
+def consume_batched(workers, group, max_records, report_interval, idle_timeout, wire_format='json'):
+    """Run `workers` consumer processes in one group and aggregate their counts."""
+    results = mp.Queue()
+    procs = [
+        mp.Process(target=batch_worker, args=(i, group, max_records, report_interval, idle_timeout, wire_format, results))
+        for i in range(workers)
+    ]
+    for p in procs:
+        p.start()
+
+    print(f"Listening to {topic_name} with {workers} worker(s) in group {group}...")
+
+    latest = {}
+    latencies = []
+    done = set()
+    t0 = last_report = time.time()
+    last_count = 0
+    while len(done) < workers:
+        try:
+            kind, worker_id, count, long_trips, lag, worker_latencies = results.get(timeout=report_interval)
+            latest[worker_id] = (count, long_trips, lag)
+            if kind == 'done':
+                done.add(worker_id)
+                latencies.append(worker_latencies)
+        except queue.Empty:
+            if not any(p.is_alive() for p in procs):
+                break
+
+        now = time.time()
+        if now - last_report >= report_interval and latest:
+            count = sum(c for c, _, _ in latest.values())
+            lag = sum(l for _, _, l in latest.values())
+            print(f"Processed {count} messages ({(count - last_count) / (now - last_report):,.0f} records/sec), "
+                  f"lag {lag}")
+            last_report, last_count = now, count
+
+    for p in procs:
+        p.join()
+
+    count = sum(c for c, _, _ in latest.values())
+    elapsed = time.time() - t0 - idle_timeout
+    if elapsed > 0:
+        print(f"Average: {count / elapsed:,.0f} records/sec (excluding the {idle_timeout}s idle wait)")
+    if latencies:
+        print_latency(np.concatenate(latencies))
+    return count, sum(t for _, t, _ in latest.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Count green-trips messages with trip_distance > 5.0')
+    parser.add_argument('--batch', action='store_true',
+                        help='Poll batches, decode them column-wise and commit once per batch')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Consumer processes in the group (--batch only; useful up to the partition count)')
+    parser.add_argument('--group-id', default=group_id, help='Consumer group id')
+    parser.add_argument('--max-records', type=int, default=5000, help='Max records per poll (--batch only)')
+    parser.add_argument('--report-interval', type=float, default=5.0,
+                        help='Seconds between progress reports (--batch only)')
+    parser.add_argument('--idle-timeout', type=float, default=5.0,
+                        help='Stop after this many seconds without messages (--batch only)')
+    parser.add_argument('--format', choices=['json', 'avro'], default='json',
+                        help='Wire format the producer used')
+    args = parser.parse_args()
+
+    if args.batch:
+        count, long_trips = consume_batched(args.workers, args.group_id, args.max_records,
+                                            args.report_interval, args.idle_timeout, args.format)
+    else:
+        count, long_trips = consume_rows(args.group_id, args.format)
+
+    print(f"\nTotal messages: {count}")
+    print(f"Trips with distance > 5.0 km: {long_trips}")
+
 
-# Q3: Consumer to count trips with trip_distance > 5.0 km
-consumer = KafkaConsumer(
-    topic_name,
-    bootstrap_servers=[server],
-    auto_offset_reset='earliest',
-    group_id='green-trips-hw3',
-    consumer_timeout_ms=5000,
-    value_deserializer=lambda x: json.loads(x.decode('utf-8'))
-)
-
-print(f"Listening to {topic_name}...")
-
-count = 0
-long_trips = 0
-
-for message in consumer:
-    trip = message.value
-    count += 1
-    if trip.get('trip_distance', 0) > 5.0:
-        long_trips += 1
-
-    if count % 10000 == 0:
-        print(f"Processed {count} messages, long trips (>5km): {long_trips}")
-
-consumer.close()
-print(f"\nTotal messages: {count}")
-print(f"Trips with distance > 5.0 km: {long_trips}")
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,8 @@ CREATE TABLE IF NOT EXISTS tumbling_window_results (
     window_end TIMESTAMP,
     PULocationID INT,
     num_trips BIGINT,
+    last_sent_at BIGINT,
+    emitted_at TIMESTAMP,
     PRIMARY KEY (window_start, PULocationID)
 );
 
@@ -13,6 +15,8 @@ CREATE TABLE IF NOT EXISTS session_window_results (
     window_end TIMESTAMP,
     PULocationID INT,
     num_trips BIGINT,
+    last_sent_at BIGINT,
+    emitted_at TIMESTAMP,
     PRIMARY KEY (window_start, PULocationID)
 );
 
@@ -21,5 +25,23 @@ CREATE TABLE IF NOT EXISTS tips_window_results (
     window_start TIMESTAMP,
     window_end TIMESTAMP,
     total_tips DOUBLE PRECISION,
+    last_sent_at BIGINT,
+    emitted_at TIMESTAMP,
     PRIMARY KEY (window_start)
 );
+
+-- Debug sink (--debug-sink): every source record with its arrival time
+CREATE TABLE IF NOT EXISTS trip_arrivals (
+    event_timestamp TIMESTAMP,
+    PULocationID INT,
+    sent_at BIGINT,
+    arrived_at TIMESTAMP
+);
+
+-- Latency columns for tables created before they were added
+ALTER TABLE tumbling_window_results ADD COLUMN IF NOT EXISTS last_sent_at BIGINT;
+ALTER TABLE tumbling_window_results ADD COLUMN IF NOT EXISTS emitted_at TIMESTAMP;
+ALTER TABLE session_window_results ADD COLUMN IF NOT EXISTS last_sent_at BIGINT;
+ALTER TABLE session_window_results ADD COLUMN IF NOT EXISTS emitted_at TIMESTAMP;
+ALTER TABLE tips_window_results ADD COLUMN IF NOT EXISTS last_sent_at BIGINT;
+ALTER TABLE tips_window_results ADD COLUMN IF NOT EXISTS emitted_at TIMESTAMP;
@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from job.common import AGGREGATIONS, add_debug_sink, create_events_source_kafka, create_table_env, env_options, job_argument_parser
+
+
+def run_all_windows(wire_format='json', debug_sink=False, **options):
+    # Q4-Q6 in one job: the source is declared once and the three INSERTs go into
+    # a single StatementSet, so the planner reuses one Kafka scan and one
+    # deserializer for all of them and there is one checkpoint to manage
+    t_env = create_table_env(**options)
+
+    try:
+        source_table = create_events_source_kafka(t_env, wire_format)
+
+        statement_set = t_env.create_statement_set()
+        for create_sink, build_insert in AGGREGATIONS.values():
+            statement_set.add_insert_sql(build_insert(source_table, create_sink(t_env)))
+        if debug_sink:
+            add_debug_sink(t_env, statement_set, source_table)
+
+        statement_set.execute().wait()
+
+    except Exception as e:
+        print("All windows job failed:", str(e))
+
+
+if __name__ == '__main__':
+    args = job_argument_parser().parse_args()
+    run_all_windows(args.format, args.debug_sink, **env_options(args))
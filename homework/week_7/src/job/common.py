@@ -0,0 +1,230 @@
+import argparse
+
+from pyflink.datastream import StreamExecutionEnvironment
+from pyflink.table import EnvironmentSettings, StreamTableEnvironment
+
+
+# JSON carries the timestamps as strings; Avro (src/schemas/green_trip.avsc) as timestamp-millis
+SOURCE_FORMATS = {
+    'json': ('STRING', "TO_TIMESTAMP(lpep_pickup_datetime, 'yyyy-MM-dd HH:mm:ss')"),
+    'avro': ('TIMESTAMP(3)', 'lpep_pickup_datetime'),
+}
+
+
+def create_table_env(parallelism=1, mini_batch=False, two_phase=False, checkpoint_seconds=10):
+    env = StreamExecutionEnvironment.get_execution_environment()
+    env.enable_checkpointing(checkpoint_seconds * 1000)
+    env.set_parallelism(parallelism)
+
+    settings = EnvironmentSettings.new_instance().in_streaming_mode().build()
+    t_env = StreamTableEnvironment.create(env, environment_settings=settings)
+    config = t_env.get_config()
+    # emitted_at/arrived_at use CURRENT_TIMESTAMP; keep them in UTC like sent_at
+    config.set('table.local-time-zone', 'UTC')
+
+    if parallelism > 1:
+        # Source subtasks without a partition (or with a drained one) would otherwise
+        # hold the watermark back and no window would ever fire
+        config.set('table.exec.source.idle-timeout', '10 s')
+    if mini_batch:
+        # Buffer input and update aggregate state once per batch instead of per record
+        config.set('table.exec.mini-batch.enabled', 'true')
+        config.set('table.exec.mini-batch.allow-latency', '1 s')
+        config.set('table.exec.mini-batch.size', '5000')
+    if two_phase:
+        # Local pre-aggregation before the shuffle by key, then a global merge
+        config.set('table.optimizer.agg-phase-strategy', 'TWO_PHASE')
+
+    return t_env
+
+
+def create_events_source_kafka(t_env, wire_format='json'):
+    table_name = "green_trips"
+    timestamp_type, event_time = SOURCE_FORMATS[wire_format]
+    source_ddl = f"""
+        CREATE TABLE {table_name} (
+            lpep_pickup_datetime {timestamp_type},
+            lpep_dropoff_datetime {timestamp_type},
+            PULocationID INTEGER,
+            DOLocationID INTEGER,
+            passenger_count DOUBLE,
+            trip_distance DOUBLE,
+            tip_amount DOUBLE,
+            total_amount DOUBLE,
+            sent_at BIGINT,
+            event_timestamp AS {event_time},
+            WATERMARK FOR event_timestamp AS event_timestamp - INTERVAL '5' SECOND
+        ) WITH (
+            'connector' = 'kafka',
+            'properties.bootstrap.servers' = 'redpanda:29092',
+            'topic' = 'green-trips',
+            'scan.startup.mode' = 'earliest-offset',
+            'properties.auto.offset.reset' = 'earliest',
+            'format' = '{wire_format}'
+        );
+        """
+    t_env.execute_sql(source_ddl)
+    return table_name
+
+
+def create_sink_postgres(t_env, table_name, columns):
+    sink_ddl = f"""
+        CREATE TABLE {table_name} (
+            {columns}
+        ) WITH (
+            'connector' = 'jdbc',
+            'url' = 'jdbc:postgresql://postgres:5432/postgres',
+            'table-name' = '{table_name}',
+            'username' = 'postgres',
+            'password' = 'postgres',
+            'driver' = 'org.postgresql.Driver'
+        );
+        """
+    t_env.execute_sql(sink_ddl)
+    return table_name
+
+
+def create_tumbling_sink_postgres(t_env):
+    return create_sink_postgres(t_env, 'tumbling_window_results', """
+            window_start TIMESTAMP(3),
+            window_end TIMESTAMP(3),
+            PULocationID INT,
+            num_trips BIGINT,
+            last_sent_at BIGINT,
+            emitted_at TIMESTAMP(3),
+            PRIMARY KEY (window_start, PULocationID) NOT ENFORCED""")
+
+
+def create_session_sink_postgres(t_env):
+    return create_sink_postgres(t_env, 'session_window_results', """
+            window_start TIMESTAMP(3),
+            window_end TIMESTAMP(3),
+            PULocationID INT,
+            num_trips BIGINT,
+            last_sent_at BIGINT,
+            emitted_at TIMESTAMP(3),
+            PRIMARY KEY (window_start, PULocationID) NOT ENFORCED""")
+
+
+def create_tips_sink_postgres(t_env):
+    return create_sink_postgres(t_env, 'tips_window_results', """
+            window_start TIMESTAMP(3),
+            window_end TIMESTAMP(3),
+            total_tips DOUBLE,
+            last_sent_at BIGINT,
+            emitted_at TIMESTAMP(3),
+            PRIMARY KEY (window_start) NOT ENFORCED""")
+
+
+def create_arrivals_sink_postgres(t_env):
+    # Debug sink: one row per source record, for watermark lag in src/latency_report.py
+    return create_sink_postgres(t_env, 'trip_arrivals', """
+            event_timestamp TIMESTAMP(3),
+            PULocationID INT,
+            sent_at BIGINT,
+            arrived_at TIMESTAMP(3)""")
+
+
+# Every window result carries the newest producer stamp among its records and
+# the wall-clock time the window fired; emitted_at - last_sent_at is the
+# event-to-sink latency of the record that closed the window
+LATENCY_COLUMNS = """
+            MAX(sent_at) AS last_sent_at,
+            CAST(CURRENT_TIMESTAMP AS TIMESTAMP(3)) AS emitted_at"""
+
+
+# Q4: 5-minute tumbling window counting trips per PULocationID
+def tumbling_insert(source_table, sink_table):
+    return f"""
+        INSERT INTO {sink_table}
+        SELECT
+            window_start,
+            window_end,
+            PULocationID,
+            COUNT(*) AS num_trips,{LATENCY_COLUMNS}
+        FROM TABLE(
+            TUMBLE(TABLE {source_table}, DESCRIPTOR(event_timestamp), INTERVAL '5' MINUTE)
+        )
+        GROUP BY window_start, window_end, PULocationID
+        """
+
+
+# Q5: Session window with 5-minute gap analyzing PULocationID
+def session_insert(source_table, sink_table):
+    return f"""
+        INSERT INTO {sink_table}
+        SELECT
+            window_start,
+            window_end,
+            PULocationID,
+            COUNT(*) AS num_trips,{LATENCY_COLUMNS}
+        FROM TABLE(
+            SESSION(TABLE {source_table} PARTITION BY PULocationID, DESCRIPTOR(event_timestamp), INTERVAL '5' MINUTE)
+        )
+        GROUP BY window_start, window_end, PULocationID
+        """
+
+
+# Q6: 1-hour tumbling window computing total tip_amount per hour
+def tips_insert(source_table, sink_table):
+    return f"""
+        INSERT INTO {sink_table}
+        SELECT
+            window_start,
+            window_end,
+            SUM(tip_amount) AS total_tips,{LATENCY_COLUMNS}
+        FROM TABLE(
+            TUMBLE(TABLE {source_table}, DESCRIPTOR(event_timestamp), INTERVAL '1' HOUR)
+        )
+        GROUP BY window_start, window_end
+        """
+
+
+def arrivals_insert(source_table, sink_table):
+    return f"""
+        INSERT INTO {sink_table}
+        SELECT
+            event_timestamp,
+            PULocationID,
+            sent_at,
+            CAST(CURRENT_TIMESTAMP AS TIMESTAMP(3)) AS arrived_at
+        FROM {source_table}
+        """
+
+
+def add_debug_sink(t_env, statement_set, source_table):
+    """Also write every source record with its arrival time to trip_arrivals."""
+    statement_set.add_insert_sql(arrivals_insert(source_table, create_arrivals_sink_postgres(t_env)))
+
+
+# name -> (sink factory, INSERT builder), in the order the jobs were written
+AGGREGATIONS = {
+    'tumbling': (create_tumbling_sink_postgres, tumbling_insert),
+    'session': (create_session_sink_postgres, session_insert),
+    'tips': (create_tips_sink_postgres, tips_insert),
+}
+
+
+def job_argument_parser():
+    # Flink's CLI keeps options it knows (like -p/--parallelism) for itself until the
+    # first unknown one, so the Makefile always passes --format first
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--format', choices=sorted(SOURCE_FORMATS), default='json',
+                        help='Wire format of the green-trips topic')
+    parser.add_argument('--parallelism', type=int, default=1,
+                        help='Job parallelism; more than the topic partition count leaves sources idle')
+    parser.add_argument('--mini-batch', action='store_true',
+                        help='Enable mini-batch aggregation (1 s / 5000 records)')
+    parser.add_argument('--two-phase', action='store_true',
+                        help='Use local-global (TWO_PHASE) aggregation')
+    parser.add_argument('--checkpoint-seconds', type=int, default=10,
+                        help='Checkpoint interval in seconds (the JDBC sinks also flush on every checkpoint)')
+    parser.add_argument('--debug-sink', action='store_true',
+                        help='Also write every record with its arrival time to trip_arrivals')
+    return parser
+
+
+def env_options(args):
+    """create_table_env keyword arguments from parsed job_argument_parser() args."""
+    return {'parallelism': args.parallelism, 'mini_batch': args.mini_batch, 'two_phase': args.two_phase,
+            'checkpoint_seconds': args.checkpoint_seconds}
@@ -1,83 +1,30 @@
-from pyflink.datastream import StreamExecutionEnvironment
-from pyflink.table import EnvironmentSettings, StreamTableEnvironment
+import sys
+from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-def create_events_source_kafka(t_env):
-    table_name = "green_trips"
-    source_ddl = f"""
-        CREATE TABLE {table_name} (
-            lpep_pickup_datetime STRING,
-            lpep_dropoff_datetime STRING,
-            PULocationID INTEGER,
-            DOLocationID INTEGER,
-            passenger_count DOUBLE,
-            trip_distance DOUBLE,
-            tip_amount DOUBLE,
-            total_amount DOUBLE,
-            event_timestamp AS TO_TIMESTAMP(lpep_pickup_datetime, 'yyyy-MM-dd HH:mm:ss'),
-            WATERMARK FOR event_timestamp AS event_timestamp - INTERVAL '5' SECOND
-        ) WITH (
-            'connector' = 'kafka',
-            'properties.bootstrap.servers' = 'redpanda:29092',
-            'topic' = 'green-trips',
-            'scan.startup.mode' = 'earliest-offset',
-            'properties.auto.offset.reset' = 'earliest',
-            'format' = 'json'
-        );
-        """
-    t_env.execute_sql(source_ddl)
-    return table_name
+from job.common import AGGREGATIONS, add_debug_sink, create_events_source_kafka, create_table_env, env_options, job_argument_parser
 
 
-def create_tips_sink_postgres(t_env):
-    table_name = 'tips_window_results'
-    sink_ddl = f"""
-        CREATE TABLE {table_name} (
-            window_start TIMESTAMP(3),
-            window_end TIMESTAMP(3),
-            total_tips DOUBLE,
-            PRIMARY KEY (window_start) NOT ENFORCED
-        ) WITH (
-            'connector' = 'jdbc',
-            'url' = 'jdbc:postgresql://postgres:5432/postgres',
-            'table-name' = '{table_name}',
-            'username' = 'postgres',
-            'password' = 'postgres',
-            'driver' = 'org.postgresql.Driver'
-        );
-        """
-    t_env.execute_sql(sink_ddl)
-    return table_name
-
-
-def run_tips_window():
+def run_tips_window(wire_format='json', debug_sink=False, **options):
     # Q6: 1-hour tumbling window computing total tip_amount per hour
-    env = StreamExecutionEnvironment.get_execution_environment()
-    env.enable_checkpointing(10 * 1000)
-    env.set_parallelism(1)
-
-    settings = EnvironmentSettings.new_instance().in_streaming_mode().build()
-    t_env = StreamTableEnvironment.create(env, environment_settings=settings)
+    t_env = create_table_env(**options)
 
     try:
-        source_table = create_events_source_kafka(t_env)
-        sink_table = create_tips_sink_postgres(t_env)
+        source_table = create_events_source_kafka(t_env, wire_format)
+        create_sink, build_insert = AGGREGATIONS['tips']
+        sink_table = create_sink(t_env)
 
-        t_env.execute_sql(f"""
-        INSERT INTO {sink_table}
-        SELECT
-            window_start,
-            window_end,
-            SUM(tip_amount) AS total_tips
-        FROM TABLE(
-            TUMBLE(TABLE {source_table}, DESCRIPTOR(event_timestamp), INTERVAL '1' HOUR)
-        )
-        GROUP BY window_start, window_end;
-        """).wait()
+        statement_set = t_env.create_statement_set()
+        statement_set.add_insert_sql(build_insert(source_table, sink_table))
+        if debug_sink:
+            add_debug_sink(t_env, statement_set, source_table)
+        statement_set.execute().wait()
 
     except Exception as e:
         print("Tips window job failed:", str(e))
 
 
 if __name__ == '__main__':
-    run_tips_window()
+    args = job_argument_parser().parse_args()
+    run_tips_window(args.format, args.debug_sink, **env_options(args))
@@ -0,0 +1,109 @@
+"""Event-to-sink latency and watermark lag of the Flink window jobs.
+
+The producer stamps every message with sent_at (epoch ms) and the jobs
+write, for every window, the newest sent_at among its records
+(last_sent_at) and the wall-clock time the window fired (emitted_at).
+For each sink table this prints p50/p95/p99 of:
+
+    event-to-sink   emitted_at - last_sent_at
+    watermark lag   emitted_at - arrival of the first record whose event time
+                    is past window_end + the 5 s out-of-orderness bound, i.e.
+                    how long after the watermark could have closed the window
+                    it actually fired (needs --debug-sink)
+    broker          arrived_at - sent_at per record in trip_arrivals (needs --debug-sink)
+
+Truncate the tables between runs so only one job's results are measured:
+
+    make all_windows_job JOB_OPTS="--debug-sink --checkpoint-seconds 10"
+    uv run src/producers/producer.py --fast
+    uv run src/latency_report.py
+"""
+
+import argparse
+
+import numpy as np
+import psycopg2
+
+WATERMARK_DELAY_MS = 5 * 1000       # WATERMARK ... - INTERVAL '5' SECOND
+SINK_TABLES = ['tumbling_window_results', 'session_window_results', 'tips_window_results']
+
+
+def epoch_ms(column):
+    return f"EXTRACT(EPOCH FROM {column})::float8 * 1000"
+
+
+def fetch_columns(conn, query):
+    cur = conn.cursor()
+    cur.execute(query)
+    rows = cur.fetchall()
+    return [np.array(col, dtype='float64') for col in zip(*rows)] if rows else None
+
+
+def percentiles(label, values):
+    if values is None or not len(values):
+        print(f"  {label:<14} no data")
+        return
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    print(f"  {label:<14} p50 {p50:>9,.0f} ms  p95 {p95:>9,.0f} ms  p99 {p99:>9,.0f} ms  ({len(values):,} rows)")
+
+
+def watermark_passed_at(arrivals):
+    """Return window_end_ms -> arrival time of the first record that lets the watermark pass it."""
+    event_ms, arrived_ms = arrivals
+    order = np.argsort(event_ms)
+    event_ms = event_ms[order]
+    # Earliest arrival among all records at or after each event time
+    first_arrival = np.minimum.accumulate(arrived_ms[order][::-1])[::-1]
+
+    def passed_at(window_end_ms):
+        idx = np.searchsorted(event_ms, window_end_ms + WATERMARK_DELAY_MS)
+        result = np.full(len(window_end_ms), np.nan)
+        seen = idx < len(event_ms)
+        result[seen] = first_arrival[idx[seen]]
+        return result
+
+    return passed_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report latency percentiles from the Flink sink tables')
+    parser.add_argument('--pg-host', default='localhost')
+    parser.add_argument('--pg-port', default='5432')
+    parser.add_argument('--pg-db', default='postgres')
+    parser.add_argument('--pg-user', default='postgres')
+    parser.add_argument('--pg-pass', default='postgres')
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(host=args.pg_host, port=args.pg_port, dbname=args.pg_db,
+                            user=args.pg_user, password=args.pg_pass)
+
+    arrivals = fetch_columns(conn, f"""
+        SELECT {epoch_ms('event_timestamp')}, {epoch_ms('arrived_at')}, sent_at::float8
+        FROM trip_arrivals WHERE sent_at IS NOT NULL""")
+    passed_at = watermark_passed_at(arrivals[:2]) if arrivals else None
+
+    for table in SINK_TABLES:
+        print(table)
+        columns = fetch_columns(conn, f"""
+            SELECT {epoch_ms('emitted_at')}, last_sent_at::float8, {epoch_ms('window_end')}
+            FROM {table} WHERE emitted_at IS NOT NULL AND last_sent_at IS NOT NULL""")
+        if columns is None:
+            print("  no windows with latency columns (re-produce the topic after upgrading the producer)")
+            continue
+        emitted, last_sent, window_end = columns
+        percentiles('event-to-sink', emitted - last_sent)
+        if passed_at is not None:
+            lag = emitted - passed_at(window_end)
+            percentiles('watermark lag', lag[~np.isnan(lag)])
+
+    print('trip_arrivals')
+    if arrivals:
+        percentiles('broker', arrivals[1] - arrivals[2])
+    else:
+        print("  empty (run a job with --debug-sink)")
+
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
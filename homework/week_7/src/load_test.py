@@ -0,0 +1,123 @@
+"""Replay green-trips through a window job at several parallelisms and report records/sec.
+
+For each parallelism the job is submitted to the docker-compose Flink
+cluster, its source vertex is polled through the Flink REST API until it
+has read every message currently in the topic, and the job is cancelled.
+The topic should already hold data, ideally spread over at least as many
+partitions as the highest parallelism:
+
+    uv run src/producers/producer.py --fast --partitions 4
+    uv run src/load_test.py --parallelism 1 2 4
+
+or `make load_test`.
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import time
+import urllib.request
+
+from kafka import KafkaConsumer, TopicPartition
+
+server = 'localhost:9092'
+topic_name = 'green-trips'
+flink_rest = 'http://localhost:8081'
+
+
+def topic_size():
+    """Messages currently in the topic and its partition count."""
+    consumer = KafkaConsumer(bootstrap_servers=[server])
+    partitions = [TopicPartition(topic_name, p) for p in consumer.partitions_for_topic(topic_name) or []]
+    end = consumer.end_offsets(partitions)
+    begin = consumer.beginning_offsets(partitions)
+    consumer.close()
+    return sum(end[tp] - begin[tp] for tp in partitions), len(partitions)
+
+
+def rest(path, method='GET'):
+    req = urllib.request.Request(f'{flink_rest}{path}', method=method)
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        body = resp.read()
+    return json.loads(body) if body else None
+
+
+def submit(job, wire_format, parallelism, extra_args):
+    """Submit a job detached and return its Flink job id."""
+    cmd = [
+        'docker', 'compose', 'exec', '-T', 'jobmanager', './bin/flink', 'run',
+        '-py', f'/opt/src/job/{job}.py', '--pyFiles', '/opt/src', '-d',
+        # --format first: Flink hands everything from the first unknown option on to the job
+        '--format', wire_format, '--parallelism', str(parallelism), *extra_args,
+    ]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    match = re.search(r'JobID ([0-9a-f]{32})', out)
+    if not match:
+        raise RuntimeError(f'Could not find the job id in:\n{out}')
+    return match.group(1)
+
+
+def source_records(job_id):
+    """Records emitted by the job's source vertex so far (summed over subtasks)."""
+    for vertex in rest(f'/jobs/{job_id}')['vertices']:
+        if vertex['name'].startswith('Source'):
+            return vertex['metrics'].get('write-records', 0)
+    return 0
+
+
+def measure(job, wire_format, parallelism, total, extra_args, timeout):
+    job_id = submit(job, wire_format, parallelism, extra_args)
+
+    # Time from the first record out of the source, so job startup is not counted
+    started = None
+    records = 0
+    deadline = time.time() + timeout
+    try:
+        while records < total and time.time() < deadline:
+            time.sleep(1)
+            records = source_records(job_id)
+            if records and started is None:
+                started = time.time()
+        elapsed = time.time() - started if started else 0
+    finally:
+        rest(f'/jobs/{job_id}?mode=cancel', method='PATCH')
+
+    if records < total:
+        print(f'  p={parallelism}: timed out after {timeout}s at {records}/{total} records')
+    return records, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the Flink window jobs at several parallelisms')
+    parser.add_argument('--parallelism', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--job', default='all_windows_job',
+                        help='Job module under src/job (all_windows_job, tumbling_window_job, ...)')
+    parser.add_argument('--format', choices=['json', 'avro'], default='json')
+    parser.add_argument('--mini-batch', action='store_true')
+    parser.add_argument('--two-phase', action='store_true')
+    parser.add_argument('--timeout', type=int, default=600, help='Max seconds per run')
+    args = parser.parse_args()
+
+    extra_args = (['--mini-batch'] if args.mini_batch else []) + (['--two-phase'] if args.two_phase else [])
+    total, partitions = topic_size()
+    if not total:
+        raise SystemExit(f'{topic_name} is empty; run the producer first')
+    print(f'{topic_name}: {total} messages in {partitions} partitions')
+    if max(args.parallelism) > partitions:
+        print(f'Note: parallelism above {partitions} leaves source subtasks idle')
+
+    results = {}
+    for parallelism in args.parallelism:
+        records, elapsed = measure(args.job, args.format, parallelism, total, extra_args, args.timeout)
+        results[parallelism] = records / elapsed if elapsed else 0
+        print(f'  p={parallelism}: {records} records in {elapsed:.1f}s ({results[parallelism]:,.0f} records/sec)')
+
+    base = results[args.parallelism[0]]
+    print('\nparallelism  records/sec  speedup')
+    for parallelism, rate in results.items():
+        print(f'{parallelism:>11}  {rate:>11,.0f}  {rate / base if base else 0:>6.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,432 @@
+"""In-process stand-in for the week_7 Flink window jobs.
+
+Runs the same three aggregations as src/job/common.py without the docker
+stack:
+
+    tumbling_window_results  5-minute tumbling COUNT(*) per PULocationID
+    session_window_results   5-minute-gap sessions, COUNT(*) per PULocationID
+    tips_window_results      1-hour tumbling SUM(tip_amount)
+
+Event time is lpep_pickup_datetime with a bounded out-of-orderness
+watermark of 5 seconds, as in the source DDL. A window fires once the
+watermark reaches its end, and records that arrive for a window that has
+already fired are dropped as late, as in Flink. State is incremental: a
+count array indexed by PULocationID per open tumbling window, a float per
+open tips window, and [start, end, count] arrays per open session.
+
+Input is the green-trips topic (json or avro) or a Parquet file (the
+October 2025 green trips by default). Results are upserted into SQLite or
+the compose Postgres using the Flink sink tables from create_tables.sql.
+
+    uv run src/local_windows.py --source parquet --sink sqlite
+    uv run src/local_windows.py --source kafka --sink sqlite --compare-postgres
+
+Differences from Flink: the watermark advances every --watermark-every
+records rather than on Flink's 200 ms timer, so with out-of-order input the
+set of dropped late records can differ. A Kafka source never finishes, so
+its last windows are not flushed at the end (as in Flink). A Parquet file
+is bounded, so its last windows are flushed, like Flink's final watermark.
+"""
+
+import argparse
+import heapq
+import io
+import sqlite3
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "shared"))
+
+import pyarrow as pa
+import pyarrow.json as pa_json
+import pyarrow.parquet as pq
+
+WATERMARK_DELAY_MS = 5 * 1000       # WATERMARK ... - INTERVAL '5' SECOND
+TUMBLE_MS = 5 * 60 * 1000           # TUMBLE ... INTERVAL '5' MINUTE
+TIPS_MS = 60 * 60 * 1000            # TUMBLE ... INTERVAL '1' HOUR
+SESSION_GAP_MS = 5 * 60 * 1000      # SESSION ... INTERVAL '5' MINUTE
+NUM_LOCATIONS = 266                 # taxi zone ids 1..265
+
+PARQUET_URL = "https://d37ci6vzurychx.cloudfront.net/trip-data/green_tripdata_2025-10.parquet"
+CREATE_TABLES_SQL = Path(__file__).parent / "create_tables.sql"
+
+server = 'localhost:9092'
+topic_name = 'green-trips'
+
+JSON_PARSE_OPTIONS = pa_json.ParseOptions(
+    explicit_schema=pa.schema([
+        ('lpep_pickup_datetime', pa.timestamp('ms')),
+        ('PULocationID', pa.int32()),
+        ('tip_amount', pa.float64()),
+    ]),
+    unexpected_field_behavior='ignore',
+)
+
+
+def ms_to_str(ms):
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+# ---------------------------------------------------------
+# Window state
+# ---------------------------------------------------------
+
+class TumblingCount:
+    """COUNT(*) per key in tumbling windows; one count array per open window."""
+
+    def __init__(self, size_ms):
+        self.size = size_ms
+        self.windows = {}               # window start -> array of counts by location id
+        self.next_end = float('inf')    # end of the earliest open window
+
+    def add(self, ts, key, watermark):
+        start = ts - ts % self.size
+        if start + self.size - 1 <= watermark:
+            return False
+        counts = self.windows.get(start)
+        if counts is None:
+            counts = self.windows[start] = array('q', bytes(8 * NUM_LOCATIONS))
+            self.next_end = min(self.next_end, start + self.size)
+        if key >= len(counts):
+            counts.extend(bytes(8 * (key + 1 - len(counts))))
+        counts[key] += 1
+        return True
+
+    def fire(self, watermark):
+        rows = []
+        for start in sorted(s for s in self.windows if s + self.size - 1 <= watermark):
+            counts = self.windows.pop(start)
+            end = start + self.size
+            rows.extend((start, end, key, n) for key, n in enumerate(counts) if n)
+        self.next_end = min(self.windows, default=float('inf')) + self.size
+        return rows
+
+
+class TumblingSum:
+    """SUM(value) in tumbling windows without a key."""
+
+    def __init__(self, size_ms):
+        self.size = size_ms
+        self.windows = {}               # window start -> running sum
+        self.next_end = float('inf')
+
+    def add(self, ts, value, watermark):
+        start = ts - ts % self.size
+        if start + self.size - 1 <= watermark:
+            return False
+        if start not in self.windows:
+            self.windows[start] = 0.0
+            self.next_end = min(self.next_end, start + self.size)
+        if value is not None:
+            self.windows[start] += value
+        return True
+
+    def fire(self, watermark):
+        rows = [(start, start + self.size, self.windows.pop(start))
+                for start in sorted(s for s in self.windows if s + self.size - 1 <= watermark)]
+        self.next_end = min(self.windows, default=float('inf')) + self.size
+        return rows
+
+
+class SessionCount:
+    """COUNT(*) per key in session windows.
+
+    Each record opens a [ts, ts + gap) session that merges with any open
+    session of the same key it overlaps or touches. Sessions are
+    array('q', [start, end, count]); a heap of (end, key, start) finds the
+    next one to fire, with entries made stale by a merge skipped when popped.
+    """
+
+    def __init__(self, gap_ms):
+        self.gap = gap_ms
+        self.sessions = {}              # key -> list of open sessions
+        self.heap = []
+
+    @property
+    def next_end(self):
+        return self.heap[0][0] if self.heap else float('inf')
+
+    def add(self, ts, key, watermark):
+        start, end, count = ts, ts + self.gap, 1
+        keep = []
+        for session in self.sessions.get(key, ()):
+            # Inclusive, like Flink's TimeWindow.intersects: records exactly gap apart merge
+            if session[0] <= end and start <= session[1]:
+                start, end, count = min(start, session[0]), max(end, session[1]), count + session[2]
+            else:
+                keep.append(session)
+        # As in Flink, assign and merge first, then drop only if the merged window has expired
+        if end - 1 <= watermark:
+            return False
+        keep.append(array('q', (start, end, count)))
+        self.sessions[key] = keep
+        heapq.heappush(self.heap, (end, key, start))
+        return True
+
+    def fire(self, watermark):
+        rows = []
+        while self.heap and self.heap[0][0] - 1 <= watermark:
+            end, key, start = heapq.heappop(self.heap)
+            open_sessions = self.sessions.get(key, [])
+            for i, session in enumerate(open_sessions):
+                if session[0] == start and session[1] == end:
+                    rows.append((start, end, key, session[2]))
+                    del open_sessions[i]
+                    break
+        return rows
+
+
+class WindowEngine:
+    """Feeds records through all three aggregations and advances the watermark."""
+
+    def __init__(self, out_of_orderness_ms=WATERMARK_DELAY_MS, watermark_every=1):
+        self.delay = out_of_orderness_ms
+        self.watermark_every = watermark_every
+        self.tumbling = TumblingCount(TUMBLE_MS)
+        self.sessions = SessionCount(SESSION_GAP_MS)
+        self.tips = TumblingSum(TIPS_MS)
+        self.max_ts = None
+        self.watermark = float('-inf')
+        self.records = 0
+        self.late = {'tumbling': 0, 'session': 0, 'tips': 0}
+
+    def process(self, timestamps, locations, tips):
+        """Process one batch of columns; returns the window results that fired."""
+        out = {'tumbling': [], 'session': [], 'tips': []}
+        tumbling, sessions, tip_windows = self.tumbling, self.sessions, self.tips
+        max_ts, watermark = self.max_ts, self.watermark
+        since_watermark = self.records % self.watermark_every
+
+        for ts, key, tip in zip(timestamps, locations, tips):
+            if ts is None:
+                continue
+            if not tumbling.add(ts, key, watermark):
+                self.late['tumbling'] += 1
+            if not sessions.add(ts, key, watermark):
+                self.late['session'] += 1
+            if not tip_windows.add(ts, tip, watermark):
+                self.late['tips'] += 1
+
+            if max_ts is None or ts > max_ts:
+                max_ts = ts
+            since_watermark += 1
+            if since_watermark >= self.watermark_every:
+                since_watermark = 0
+                if max_ts - self.delay > watermark:
+                    watermark = max_ts - self.delay
+                    self._fire(watermark, out)
+
+        self.records += len(timestamps)
+        self.max_ts, self.watermark = max_ts, watermark
+        return out
+
+    def _fire(self, watermark, out):
+        if self.tumbling.next_end - 1 <= watermark:
+            out['tumbling'] += self.tumbling.fire(watermark)
+        if self.sessions.next_end - 1 <= watermark:
+            out['session'] += self.sessions.fire(watermark)
+        if self.tips.next_end - 1 <= watermark:
+            out['tips'] += self.tips.fire(watermark)
+
+    def flush(self):
+        """Fire everything still open, as Flink does at the end of a bounded source."""
+        out = {'tumbling': [], 'session': [], 'tips': []}
+        self._fire(float('inf'), out)
+        return out
+
+
+# ---------------------------------------------------------
+# Sources
+# ---------------------------------------------------------
+
+def iter_parquet(path, batch_size):
+    """Yield (pickup epoch ms, PULocationID, tip_amount) column lists per batch."""
+    pf = pq.ParquetFile(path)
+    for batch in pf.iter_batches(batch_size, columns=['lpep_pickup_datetime', 'PULocationID', 'tip_amount']):
+        pickup = batch.column('lpep_pickup_datetime').cast(pa.timestamp('ms')).cast(pa.int64())
+        yield pickup.to_pylist(), batch.column('PULocationID').to_pylist(), batch.column('tip_amount').to_pylist()
+
+
+def iter_kafka(wire_format, batch_size, idle_timeout):
+    """Yield column lists per polled batch from the start of the topic until it goes idle."""
+    from kafka import KafkaConsumer
+    from schemas import avro_decode
+
+    consumer = KafkaConsumer(
+        topic_name,
+        bootstrap_servers=[server],
+        auto_offset_reset='earliest',
+        enable_auto_commit=False,
+        group_id=None,
+        max_poll_records=batch_size,
+    )
+    last_message = time.time()
+    try:
+        while time.time() - last_message < idle_timeout:
+            polled = consumer.poll(timeout_ms=1000, max_records=batch_size)
+            if not polled:
+                continue
+            last_message = time.time()
+            # Partitions interleave as they would reaching a single Flink source
+            values = [record.value for records in polled.values() for record in records]
+            if wire_format == 'avro':
+                trips = [avro_decode(v) for v in values]
+                yield ([int(t['lpep_pickup_datetime'].timestamp() * 1000) for t in trips],
+                       [t['PULocationID'] for t in trips],
+                       [t['tip_amount'] for t in trips])
+            else:
+                table = pa_json.read_json(io.BytesIO(b'\n'.join(values)), parse_options=JSON_PARSE_OPTIONS)
+                yield (table['lpep_pickup_datetime'].cast(pa.int64()).to_pylist(),
+                       table['PULocationID'].to_pylist(),
+                       table['tip_amount'].to_pylist())
+    finally:
+        consumer.close()
+
+
+# ---------------------------------------------------------
+# Sinks
+# ---------------------------------------------------------
+
+UPSERTS = {
+    'tumbling': ('tumbling_window_results', ['window_start', 'window_end', 'PULocationID', 'num_trips'],
+                 ['window_start', 'PULocationID']),
+    'session': ('session_window_results', ['window_start', 'window_end', 'PULocationID', 'num_trips'],
+                ['window_start', 'PULocationID']),
+    'tips': ('tips_window_results', ['window_start', 'window_end', 'total_tips'], ['window_start']),
+}
+
+
+class SqlSink:
+    """Upserts fired windows into the Flink sink tables over a DB-API connection."""
+
+    def __init__(self, conn, placeholder):
+        self.conn = conn
+        self.placeholder = placeholder
+        with conn:
+            cur = conn.cursor()
+            for statement in CREATE_TABLES_SQL.read_text().split(';'):
+                # SQLite has no ADD COLUMN IF NOT EXISTS, and the engine leaves the latency columns NULL
+                if statement.strip() and not (placeholder == '?' and 'ALTER TABLE' in statement):
+                    cur.execute(statement)
+
+    def write(self, fired):
+        with self.conn:
+            cur = self.conn.cursor()
+            for name, rows in fired.items():
+                if not rows:
+                    continue
+                table, columns, key = UPSERTS[name]
+                updates = ', '.join(f'{c} = excluded.{c}' for c in columns if c not in key)
+                sql = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                       f"VALUES ({', '.join([self.placeholder] * len(columns))}) "
+                       f"ON CONFLICT ({', '.join(key)}) DO UPDATE SET {updates}")
+                cur.executemany(sql, [(ms_to_str(row[0]), ms_to_str(row[1]), *row[2:]) for row in rows])
+
+
+def connect_postgres(args):
+    import psycopg2
+    return psycopg2.connect(host=args.pg_host, port=args.pg_port, dbname=args.pg_db,
+                            user=args.pg_user, password=args.pg_pass)
+
+
+def compare_with_postgres(local_conn, args):
+    """Report rows that differ between the local results and the Flink job's Postgres tables."""
+    pg = connect_postgres(args)
+    for table, columns, key in UPSERTS.values():
+        query = f"SELECT {', '.join(columns)} FROM {table}"
+        local_cur = local_conn.cursor()
+        local_cur.execute(query)
+        pg_cur = pg.cursor()
+        pg_cur.execute(query)
+        normalize = lambda row: (str(row[0])[:19], str(row[1])[:19], *(round(v, 6) for v in row[2:]))
+        local_rows = {normalize(row) for row in local_cur.fetchall()}
+        flink_rows = {normalize(row) for row in pg_cur.fetchall()}
+        print(f"{table}: {len(local_rows)} local, {len(flink_rows)} in Postgres, "
+              f"{len(local_rows - flink_rows)} only local, {len(flink_rows - local_rows)} only in Postgres")
+    pg.close()
+
+
+# ---------------------------------------------------------
+# CLI
+# ---------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the week_7 window aggregations in process')
+    parser.add_argument('--source', choices=['parquet', 'kafka'], default='parquet')
+    parser.add_argument('--path', help='Parquet file (default: October 2025 green trips via the download cache)')
+    parser.add_argument('--format', choices=['json', 'avro'], default='json', help='Topic wire format (kafka)')
+    parser.add_argument('--sink', choices=['sqlite', 'postgres', 'none'], default='sqlite')
+    parser.add_argument('--sqlite-path', default='local_windows.sqlite')
+    parser.add_argument('--pg-host', default='localhost')
+    parser.add_argument('--pg-port', default='5432')
+    parser.add_argument('--pg-db', default='postgres')
+    parser.add_argument('--pg-user', default='postgres')
+    parser.add_argument('--pg-pass', default='postgres')
+    parser.add_argument('--batch-size', type=int, default=100_000, help='Records per batch read and sink write')
+    parser.add_argument('--watermark-every', type=int, default=1, help='Advance the watermark every N records')
+    parser.add_argument('--flush', action=argparse.BooleanOptionalAction, default=None,
+                        help='Fire open windows at the end (default: only for parquet)')
+    parser.add_argument('--idle-timeout', type=float, default=5.0, help='Stop reading Kafka after N idle seconds')
+    parser.add_argument('--compare-postgres', action='store_true',
+                        help='Afterwards, diff the local results against the Flink tables in Postgres')
+    args = parser.parse_args()
+
+    if args.source == 'parquet':
+        if args.path is None:
+            import tlc_cache
+            args.path = tlc_cache.fetch(PARQUET_URL)
+        batches = iter_parquet(args.path, args.batch_size)
+    else:
+        batches = iter_kafka(args.format, args.batch_size, args.idle_timeout)
+
+    if args.sink == 'sqlite':
+        conn = sqlite3.connect(args.sqlite_path)
+        sink = SqlSink(conn, '?')
+    elif args.sink == 'postgres':
+        conn = connect_postgres(args)
+        sink = SqlSink(conn, '%s')
+    else:
+        conn = sink = None
+
+    engine = WindowEngine(watermark_every=args.watermark_every)
+    emitted = {'tumbling': 0, 'session': 0, 'tips': 0}
+    process_secs = 0.0
+
+    def emit(fired):
+        for name, rows in fired.items():
+            emitted[name] += len(rows)
+        if sink is not None:
+            sink.write(fired)
+
+    t0 = time.time()
+    for timestamps, locations, tips in batches:
+        p0 = time.time()
+        fired = engine.process(timestamps, locations, tips)
+        process_secs += time.time() - p0
+        emit(fired)
+
+    flush = args.flush if args.flush is not None else args.source == 'parquet'
+    if flush:
+        emit(engine.flush())
+    elapsed = time.time() - t0
+
+    print(f"Processed {engine.records:,} records in {elapsed:.2f}s "
+          f"({engine.records / elapsed:,.0f} records/sec end to end, "
+          f"{engine.records / process_secs if process_secs else 0:,.0f} records/sec in the window operators)")
+    for name, count in emitted.items():
+        print(f"  {UPSERTS[name][0]}: {count:,} rows emitted, {engine.late[name]:,} late records dropped")
+
+    if args.compare_postgres:
+        if args.sink != 'sqlite':
+            raise SystemExit('--compare-postgres needs --sink sqlite')
+        compare_with_postgres(conn, args)
+    if conn is not None:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
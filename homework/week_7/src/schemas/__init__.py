@@ -0,0 +1,58 @@
+"""Avro wire format for the green-trips topic.
+
+Messages are bare Avro binary (no container header, no schema registry
+prefix), which is what Flink's 'avro' format reads. Timestamps are
+timestamp-millis: naive pickup/dropoff times as epoch milliseconds in UTC.
+"""
+
+import io
+import json
+from pathlib import Path
+
+import fastavro
+
+GREEN_TRIP_SCHEMA = fastavro.parse_schema(
+    json.loads((Path(__file__).parent / "green_trip.avsc").read_text())
+)
+
+TIMESTAMP_FIELDS = ["lpep_pickup_datetime", "lpep_dropoff_datetime"]
+
+
+def avro_encoder(schema=GREEN_TRIP_SCHEMA):
+    """Return a record -> bytes function that reuses one buffer across calls."""
+    buf = io.BytesIO()
+
+    def encode(record):
+        buf.seek(0)
+        buf.truncate()
+        fastavro.schemaless_writer(buf, schema, record)
+        return buf.getvalue()
+
+    return encode
+
+
+def _zigzag_varint(n):
+    n = (n << 1) ^ (n >> 63)
+    out = bytearray()
+    while n & ~0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def stamp_sent_at(payload, sent_at, wire_format='json'):
+    """Set sent_at (epoch ms) on a message encoded without it, just before sending.
+
+    sent_at is the last field, encoded as a one-byte null (Avro union branch 0)
+    or absent (JSON), so the stamp replaces the final byte instead of
+    re-encoding the whole record.
+    """
+    if wire_format == 'avro':
+        return payload[:-1] + b'\x02' + _zigzag_varint(sent_at)
+    return payload[:-1] + b',"sent_at":%d}' % sent_at
+
+
+def avro_decode(payload, schema=GREEN_TRIP_SCHEMA):
+    """Decode one message; timestamps come back as timezone-aware datetimes."""
+    return fastavro.schemaless_reader(io.BytesIO(payload), schema, None)
@@ -9,9 +9,12 @@ def _():
     import marimo as mo
     import duckdb
     import altair as alt
+    from summary import TaxiSummary
 
     conn = duckdb.connect("taxi_pipeline.duckdb")
-    return alt, conn, mo
+    # One grouped scan per dlt load; every cell below reads from this
+    summary = TaxiSummary(conn)
+    return alt, mo, summary
 
 
 @app.cell
@@ -26,15 +29,11 @@ def _(mo):
 
 
 @app.cell
-def _(conn, mo):
-    total_rows = conn.execute("SELECT COUNT(*) FROM nyc_taxi.taxi_rows").fetchone()[0]
-    earliest, latest = conn.execute(
-        "SELECT MIN(trip_pickup_date_time), MAX(trip_pickup_date_time) FROM nyc_taxi.taxi_rows"
-    ).fetchone()
-    total_tips = conn.execute("SELECT ROUND(SUM(tip_amt), 2) FROM nyc_taxi.taxi_rows").fetchone()[0]
-    credit_pct = conn.execute(
-        "SELECT ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER(), 2) FROM nyc_taxi.taxi_rows WHERE payment_type = 'Credit'"
-    ).fetchone()[0]
+def _(mo, summary):
+    total_rows = summary.total.trips
+    earliest, latest = summary.total.min_pickup, summary.total.max_pickup
+    total_tips = round(summary.total.total_tips, 2)
+    credit_pct = summary.credit_pct()
 
     mo.hstack([
         mo.stat(label="Total Trips", value=f"{total_rows:,}"),
@@ -54,36 +53,19 @@ def _(mo):
 
 
 @app.cell
-def _(conn, mo):
-    date_data = conn.execute("""
-        SELECT
-            STRFTIME(trip_pickup_date_time, '%Y-%m') AS month,
-            COUNT(*) AS trips
-        FROM nyc_taxi.taxi_rows
-        GROUP BY month
-        ORDER BY month
-    """).fetchall()
-
+def _(mo, summary):
     mo.ui.table(
-        [{"Month": r[0], "Trips": r[1]} for r in date_data],
+        [{"Month": g.key, "Trips": g.trips} for g in summary.months()],
         label="Trips per month"
     )
     return
 
 
 @app.cell
-def _(alt, conn):
+def _(alt, summary):
     import warnings
-    rows = conn.execute("""
-        SELECT
-            STRFTIME(trip_pickup_date_time, '%Y-%m-%d') AS day,
-            COUNT(*) AS trips
-        FROM nyc_taxi.taxi_rows
-        GROUP BY day
-        ORDER BY day
-    """).fetchall()
 
-    data = [{"date": r[0], "trips": r[1]} for r in rows]
+    data = [{"date": g.key, "trips": g.trips} for g in summary.days()]
 
     with warnings.catch_warnings():
         warnings.simplefilter("ignore")
@@ -110,16 +92,8 @@ def _(mo):
 
 
 @app.cell
-def _(conn, mo):
-    payment_rows = conn.execute("""
-        SELECT
-            payment_type,
-            COUNT(*) AS trips,
-            ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER(), 2) AS pct
-        FROM nyc_taxi.taxi_rows
-        GROUP BY payment_type
-        ORDER BY trips DESC
-    """).fetchall()
+def _(mo, summary):
+    payment_rows = summary.payment_types()
 
     mo.ui.table(
         [{"Payment Type": r[0], "Trips": r[1], "Percentage": f"{r[2]}%"} for r in payment_rows],
@@ -159,15 +133,14 @@ def _(mo):
 
 
 @app.cell
-def _(conn, mo):
-    tip_stats = conn.execute("""
-        SELECT
-            ROUND(SUM(tip_amt), 2)   AS total_tips,
-            ROUND(AVG(tip_amt), 2)   AS avg_tip,
-            ROUND(MAX(tip_amt), 2)   AS max_tip,
-            COUNT(*) FILTER (WHERE tip_amt > 0) AS tippers
-        FROM nyc_taxi.taxi_rows
-    """).fetchone()
+def _(mo, summary):
+    _t = summary.total
+    tip_stats = (
+        round(_t.total_tips, 2),
+        round(_t.total_tips / _t.tip_count, 2) if _t.tip_count else 0.0,
+        round(_t.max_tip, 2),
+        _t.tippers,
+    )
 
     mo.hstack([
         mo.stat(label="Total Tips", value=f"${tip_stats[0]:,.2f}"),
@@ -179,34 +152,10 @@ def _(conn, mo):
 
 
 @app.cell
-def _(alt, conn):
+def _(alt, summary):
     import warnings as _w2
 
-    tip_rows = conn.execute("""
-        SELECT
-            CASE
-                WHEN tip_amt = 0      THEN '0'
-                WHEN tip_amt < 2      THEN '0–2'
-                WHEN tip_amt < 5      THEN '2–5'
-                WHEN tip_amt < 10     THEN '5–10'
-                WHEN tip_amt < 20     THEN '10–20'
-                ELSE '20+'
-            END AS bucket,
-            COUNT(*) AS trips,
-            CASE
-                WHEN tip_amt = 0      THEN 0
-                WHEN tip_amt < 2      THEN 1
-                WHEN tip_amt < 5      THEN 2
-                WHEN tip_amt < 10     THEN 3
-                WHEN tip_amt < 20     THEN 4
-                ELSE 5
-            END AS sort_order
-        FROM nyc_taxi.taxi_rows
-        GROUP BY bucket, sort_order
-        ORDER BY sort_order
-    """).fetchall()
-
-    tip_data = [{"bucket": r[0], "trips": r[1]} for r in tip_rows]
+    tip_data = [{"bucket": g.key, "trips": g.trips} for g in summary.tip_buckets()]
 
     with _w2.catch_warnings():
         _w2.simplefilter("ignore")
@@ -0,0 +1,123 @@
+"""Local stand-in for the paginated taxi API.
+
+Serves ?page=N the way the real endpoint does: a JSON list of up to
+page_size trips with the API's field names, ordered by pickup time, and an
+empty list after the last page. Each response can be delayed to mimic the
+round trip to the cloud function. Speaks HTTP/1.1 keep-alive and counts
+requests and distinct connections, so benchmarks can show how many pages
+were fetched past the end and how many connections were opened.
+
+    python api_stub.py --pages 10 --latency-ms 150
+    python taxi_pipeline.py --base-url http://127.0.0.1:8765 --max-in-flight 4
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def make_trips(n, start=datetime(2009, 6, 1), seed=0):
+    """n synthetic trips with the API's columns, pickups in ascending order from start."""
+    rng = random.Random(seed)
+    trips = []
+    pickup = start
+    for _ in range(n):
+        pickup += timedelta(seconds=rng.randint(0, 300))
+        distance = round(rng.uniform(0.3, 20.0), 2)
+        fare = round(2.5 + distance * 2.0, 2)
+        tip = round(fare * rng.choice([0, 0, 0.1, 0.2]), 2)
+        trips.append({
+            "End_Lat": round(40.7 + rng.uniform(-0.1, 0.1), 6),
+            "End_Lon": round(-73.98 + rng.uniform(-0.1, 0.1), 6),
+            "Fare_Amt": fare,
+            "Passenger_Count": rng.randint(1, 5),
+            "Payment_Type": rng.choice(["Credit", "CASH", "Cash"]),
+            "Rate_Code": None,
+            "Start_Lat": round(40.7 + rng.uniform(-0.1, 0.1), 6),
+            "Start_Lon": round(-73.98 + rng.uniform(-0.1, 0.1), 6),
+            "Tip_Amt": tip,
+            "Tolls_Amt": 0.0,
+            "Total_Amt": round(fare + tip, 2),
+            "Trip_Distance": distance,
+            "Trip_Dropoff_DateTime": (pickup + timedelta(minutes=distance * 3)).strftime("%Y-%m-%d %H:%M:%S"),
+            "Trip_Pickup_DateTime": pickup.strftime("%Y-%m-%d %H:%M:%S"),
+            "mta_tax": None,
+            "store_and_forward": None,
+            "surcharge": 0.0,
+            "vendor_name": rng.choice(["VTS", "CMT", "DDS"]),
+        })
+    return trips
+
+
+class ApiStub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, trips, page_size=1000, latency_ms=0, port=0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.trips = trips
+        self.page_size = page_size
+        self.latency_ms = latency_ms
+        self.lock = threading.Lock()
+        self.reset_counters()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = 0
+            self.connections = set()
+
+    def append(self, trips):
+        """Publish more trips after the existing ones, as new data arriving in the API."""
+        with self.lock:
+            self.trips = self.trips + trips
+
+    def page(self, n):
+        start = (n - 1) * self.page_size
+        return self.trips[start:start + self.page_size] if n >= 1 else []
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+        page = int(parse_qs(urlparse(self.path).query).get("page", ["1"])[0])
+        if server.latency_ms:
+            time.sleep(server.latency_ms / 1000)
+        body = json.dumps(server.page(page)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve synthetic taxi pages locally")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    stub = ApiStub(make_trips(args.pages * args.page_size), args.page_size, args.latency_ms, args.port)
+    print(f"Serving {args.pages} pages at {stub.url}")
+    stub.serve_forever()
@@ -0,0 +1,43 @@
+"""Time page extraction against the local API stub at several max_in_flight values.
+
+Reports pages/sec, how many requests reached the stub (pages past the end
+included) and how many connections were opened for them.
+
+    python bench_extract.py --pages 50 --latency-ms 100 --max-in-flight 1 2 4 8
+"""
+
+import argparse
+import time
+
+from api_stub import ApiStub, make_trips
+from taxi_pipeline import iter_pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sequential vs concurrent page extraction")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=int, default=100, help="Delay per response, like the real round trip")
+    parser.add_argument("--max-in-flight", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    stub = ApiStub(make_trips(args.pages * args.page_size), args.page_size, args.latency_ms).start()
+
+    print(f"{args.pages} pages of {args.page_size}, {args.latency_ms} ms per response")
+    print("max_in_flight    seconds  pages/sec  rows  requests  connections  speedup")
+    baseline = None
+    for max_in_flight in args.max_in_flight:
+        stub.reset_counters()
+        t0 = time.time()
+        rows = sum(len(page) for page in iter_pages(stub.url, max_in_flight))
+        elapsed = time.time() - t0
+        baseline = baseline or elapsed
+        print(f"{max_in_flight:>13}  {elapsed:>9.2f}  {args.pages / elapsed:>9.1f}  {rows}  "
+              f"{stub.requests:>8}  {len(stub.connections):>11}   {baseline / elapsed:.1f}x")
+        assert rows == len(stub.trips)
+
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Compare a full (replace) load with an incremental (merge) load into DuckDB.
+
+Both run against the local API stub. After an initial load, --new-pages
+pages of later trips are appended to the stub, and each mode loads again:
+
+    full         re-extracts every page and rewrites nyc_taxi.taxi_rows
+    incremental  resumes from the last page it saw and merges only new trips
+
+Each pipeline gets its own DuckDB file and pipelines dir under a temp
+directory that is removed at the end, so the workshop's
+taxi_pipeline.duckdb is not touched.
+
+    python bench_load.py --pages 50 --new-pages 2 --latency-ms 100 --max-in-flight 4
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import dlt
+import duckdb
+
+from api_stub import ApiStub, make_trips
+from taxi_pipeline import taxi_source
+
+
+def run(pipeline, stub, incremental, max_in_flight):
+    """Load once; returns (seconds, API requests made)."""
+    stub.reset_counters()
+    t0 = time.time()
+    pipeline.run(taxi_source(base_url=stub.url, max_in_flight=max_in_flight, incremental=incremental))
+    return time.time() - t0, stub.requests
+
+
+def table_rows(db_path):
+    with duckdb.connect(str(db_path), read_only=True) as conn:
+        return conn.execute("SELECT COUNT(*) FROM nyc_taxi.taxi_rows").fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full vs incremental taxi loads into DuckDB")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--new-pages", type=int, default=2, help="Pages appended before the second run")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=int, default=100)
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    args = parser.parse_args()
+
+    trips = make_trips(args.pages * args.page_size)
+    last_pickup = datetime.strptime(trips[-1]["Trip_Pickup_DateTime"], "%Y-%m-%d %H:%M:%S")
+    new_trips = make_trips(args.new_pages * args.page_size, start=last_pickup + timedelta(minutes=1), seed=1)
+
+    workdir = Path(tempfile.mkdtemp(prefix="taxi_bench_"))
+    print(f"{args.pages} pages + {args.new_pages} new, {args.page_size} rows/page, "
+          f"{args.latency_ms} ms/response, max_in_flight {args.max_in_flight}")
+    print("mode          run      seconds  requests   rows in table")
+    for mode, incremental in [("full", False), ("incremental", True)]:
+        db_path = workdir / f"{mode}.duckdb"
+        pipeline = dlt.pipeline(
+            pipeline_name=f"taxi_bench_{mode}",
+            destination=dlt.destinations.duckdb(str(db_path)),
+            dataset_name="nyc_taxi",
+            pipelines_dir=str(workdir / "pipelines"),
+        )
+        stub = ApiStub(list(trips), args.page_size, args.latency_ms).start()
+        for label in ["initial", "repeat"]:
+            if label == "repeat":
+                stub.append(new_trips)
+            elapsed, requests = run(pipeline, stub, incremental, args.max_in_flight)
+            print(f"{mode:<12}  {label:<7}  {elapsed:>7.2f}  {requests:>8}   {table_rows(db_path):>13,}")
+        stub.shutdown()
+
+    expected = len(trips) + len(new_trips)
+    print(f"Expected {expected:,} rows after the repeat run in both modes")
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Summary layer for analysis.py.
+
+Every breakdown the notebook shows (headline stats, trips per month and per
+day, payment types, tip buckets) comes from one GROUPING SETS query, i.e. a
+single scan of nyc_taxi.taxi_rows. The result is stored in
+summary.taxi_rows_summary, tagged with the dlt load_id it was built from.
+It is rebuilt only when a newer completed load appears in
+nyc_taxi._dlt_loads, so reopening the notebook reads a few hundred rows
+instead of rescanning the table.
+
+    python summary.py            # build or reuse, print timings
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import duckdb
+
+SOURCE_TABLE = "nyc_taxi.taxi_rows"
+SUMMARY_TABLE = "summary.taxi_rows_summary"
+VERSIONS_TABLE = "summary.versions"
+KEEP_VERSIONS = 3
+
+# Bucket label and sort order, as in the tip distribution chart
+TIP_BUCKET_SQL = """
+    CASE
+        WHEN tip_amt = 0      THEN '0'
+        WHEN tip_amt < 2      THEN '0–2'
+        WHEN tip_amt < 5      THEN '2–5'
+        WHEN tip_amt < 10     THEN '5–10'
+        WHEN tip_amt < 20     THEN '10–20'
+        ELSE '20+'
+    END"""
+TIP_ORDER_SQL = """
+    CASE
+        WHEN tip_amt = 0      THEN 0
+        WHEN tip_amt < 2      THEN 1
+        WHEN tip_amt < 5      THEN 2
+        WHEN tip_amt < 10     THEN 3
+        WHEN tip_amt < 20     THEN 4
+        ELSE 5
+    END"""
+
+BUILD_SQL = f"""
+    WITH trips AS (
+        SELECT
+            STRFTIME(trip_pickup_date_time, '%Y-%m')    AS month,
+            STRFTIME(trip_pickup_date_time, '%Y-%m-%d') AS day,
+            payment_type,
+            {TIP_BUCKET_SQL} AS tip_bucket,
+            {TIP_ORDER_SQL} AS tip_order,
+            tip_amt,
+            trip_pickup_date_time
+        FROM {SOURCE_TABLE}
+    )
+    SELECT
+        ? AS load_id,
+        CASE
+            WHEN GROUPING(month) = 0        THEN 'month'
+            WHEN GROUPING(day) = 0          THEN 'day'
+            WHEN GROUPING(payment_type) = 0 THEN 'payment_type'
+            WHEN GROUPING(tip_bucket) = 0   THEN 'tip_bucket'
+            ELSE 'total'
+        END AS grain,
+        COALESCE(month, day, payment_type, tip_bucket) AS key,
+        tip_order AS sort_order,
+        COUNT(*) AS trips,
+        COUNT(tip_amt) AS tip_count,
+        SUM(tip_amt) AS total_tips,
+        MAX(tip_amt) AS max_tip,
+        COUNT(*) FILTER (WHERE tip_amt > 0) AS tippers,
+        MIN(trip_pickup_date_time) AS min_pickup,
+        MAX(trip_pickup_date_time) AS max_pickup
+    FROM trips
+    GROUP BY GROUPING SETS ((), (month), (day), (payment_type), (tip_bucket, tip_order))
+"""
+
+
+@dataclass
+class Group:
+    key: Optional[str]
+    sort_order: Optional[int]
+    trips: int
+    tip_count: int
+    total_tips: float
+    max_tip: float
+    tippers: int
+    min_pickup: datetime
+    max_pickup: datetime
+
+
+def latest_load_id(conn: duckdb.DuckDBPyConnection) -> Optional[str]:
+    """The newest completed dlt load (status 0), or None before the first load."""
+    row = conn.execute("SELECT MAX(load_id) FROM nyc_taxi._dlt_loads WHERE status = 0").fetchone()
+    return row[0]
+
+
+def _create_tables(conn: duckdb.DuckDBPyConnection) -> None:
+    conn.execute("CREATE SCHEMA IF NOT EXISTS summary")
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} (
+            load_id VARCHAR, grain VARCHAR, key VARCHAR, sort_order INTEGER,
+            trips BIGINT, tip_count BIGINT, total_tips DOUBLE, max_tip DOUBLE, tippers BIGINT,
+            min_pickup TIMESTAMPTZ, max_pickup TIMESTAMPTZ
+        )""")
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {VERSIONS_TABLE} (
+            load_id VARCHAR PRIMARY KEY, built_at TIMESTAMPTZ, build_seconds DOUBLE
+        )""")
+
+
+def refresh(conn: duckdb.DuckDBPyConnection) -> Tuple[str, bool]:
+    """Make sure the summary matches the latest load; returns (load_id, rebuilt)."""
+    _create_tables(conn)
+    load_id = latest_load_id(conn)
+    if load_id is None:
+        raise RuntimeError("No completed dlt load found; run taxi_pipeline.py first")
+
+    built = conn.execute(f"SELECT 1 FROM {VERSIONS_TABLE} WHERE load_id = ?", [load_id]).fetchone()
+    if built:
+        return load_id, False
+
+    t0 = time.perf_counter()
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        conn.execute(f"INSERT INTO {SUMMARY_TABLE} {BUILD_SQL}", [load_id])
+        conn.execute(f"INSERT INTO {VERSIONS_TABLE} VALUES (?, now(), ?)", [load_id, time.perf_counter() - t0])
+        # Older versions are kept for comparison, up to KEEP_VERSIONS
+        stale = f"""
+            SELECT load_id FROM {VERSIONS_TABLE}
+            ORDER BY load_id DESC OFFSET {KEEP_VERSIONS}"""
+        conn.execute(f"DELETE FROM {SUMMARY_TABLE} WHERE load_id IN ({stale})")
+        conn.execute(f"DELETE FROM {VERSIONS_TABLE} WHERE load_id IN ({stale})")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return load_id, True
+
+
+class TaxiSummary:
+    """The current summary version, read once; accessors mirror the notebook cells."""
+
+    def __init__(self, conn: duckdb.DuckDBPyConnection):
+        self.load_id, self.rebuilt = refresh(conn)
+        self.groups: Dict[str, List[Group]] = {}
+        rows = conn.execute(f"""
+            SELECT grain, key, sort_order, trips, tip_count, total_tips, max_tip, tippers, min_pickup, max_pickup
+            FROM {SUMMARY_TABLE} WHERE load_id = ?""", [self.load_id]).fetchall()
+        for grain, *values in rows:
+            self.groups.setdefault(grain, []).append(Group(*values))
+
+    @property
+    def total(self) -> Group:
+        return self.groups["total"][0]
+
+    def _by_key(self, grain: str) -> List[Group]:
+        # Rows with a NULL pickup time form a group with key None; list it last
+        return sorted(self.groups.get(grain, []), key=lambda g: (g.key is None, g.key or ""))
+
+    def months(self) -> List[Group]:
+        return self._by_key("month")
+
+    def days(self) -> List[Group]:
+        return self._by_key("day")
+
+    def payment_types(self) -> List[Tuple[str, int, float]]:
+        """(payment_type, trips, percent of all trips), most trips first."""
+        groups = sorted(self.groups.get("payment_type", []), key=lambda g: g.trips, reverse=True)
+        return [(g.key, g.trips, round(g.trips * 100.0 / self.total.trips, 2)) for g in groups]
+
+    def tip_buckets(self) -> List[Group]:
+        return sorted(self.groups.get("tip_bucket", []), key=lambda g: g.sort_order)
+
+    def credit_pct(self) -> float:
+        return next((pct for key, _, pct in self.payment_types() if key == "Credit"), 0.0)
+
+
+if __name__ == "__main__":
+    conn = duckdb.connect("taxi_pipeline.duckdb")
+    for attempt in ["first open", "reopen"]:
+        t0 = time.perf_counter()
+        summary = TaxiSummary(conn)
+        elapsed = time.perf_counter() - t0
+        action = "rebuilt" if summary.rebuilt else "reused"
+        print(f"{attempt}: {action} summary for load {summary.load_id} in {elapsed * 1000:.1f} ms "
+              f"({summary.total.trips:,} trips)")
+    conn.close()
@@ -4,34 +4,135 @@ Base URL: https://us-central1-dlthub-analytics.cloudfunctions.net/data_engineeri
 
 Pages through the API (1000 records per page) until an empty page is returned,
 then loads all records into DuckDB under the `nyc_taxi` dataset.
+
+With max_in_flight > 1 the next pages are requested while earlier ones are
+still in flight, over keep-alive connections, and pages are still yielded in
+order. The first empty page ends extraction; by then at most
+max_in_flight - 1 pages past it have been requested.
+
+Each page is yielded as one Arrow table with snake_case columns and parsed
+timestamps. The default run replaces nyc_taxi.taxi_rows. With
+incremental=True the resource merges on TRIP_KEY instead. It keeps a cursor
+on trip_pickup_date_time and resumes from the last non-empty page of the
+previous run. The API serves trips in pickup order but has no server-side
+filter, so that page is fetched again: the cursor drops the rows before the
+last pickup seen, and the merge deduplicates the ones at it.
 """
 
-from typing import Iterator, Dict, Any
-from urllib.parse import urlencode
-import urllib.request
-import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Dict, Any, List
+import argparse
+import threading
+
 import dlt
+import pyarrow as pa
+import pyarrow.compute as pc
+import requests
+from dlt.common.normalizers.naming.snake_case import NamingConvention
 
 _BASE_URL = "https://us-central1-dlthub-analytics.cloudfunctions.net/data_engineering_zoomcamp_api"
 
+_TIMESTAMP_TYPE = pa.timestamp("us", tz="UTC")
+# Fixed types so a page of whole-number fares (or all-null taxes) cannot change a column's type
+_COLUMN_TYPES = {
+    "trip_pickup_date_time": _TIMESTAMP_TYPE,
+    "trip_dropoff_date_time": _TIMESTAMP_TYPE,
+    "passenger_count": pa.int64(),
+    **{name: pa.float64() for name in [
+        "start_lat", "start_lon", "end_lat", "end_lon", "trip_distance", "fare_amt",
+        "tip_amt", "tolls_amt", "total_amt", "surcharge", "mta_tax",
+    ]},
+}
 
-@dlt.source
-def taxi_source(page_size: int = 1000):
-    """DLT source that yields taxi rows from the paginated REST API."""
+# The API has no trip id; these identify a trip for merge loads
+TRIP_KEY = [
+    "trip_pickup_date_time", "trip_dropoff_date_time",
+    "start_lat", "start_lon", "end_lat", "end_lon",
+]
+
+_naming = NamingConvention()
+
+
+def fetch_page(session: requests.Session, base_url: str, page: int) -> List[Dict[str, Any]]:
+    resp = session.get(base_url, params={"page": page}, timeout=30)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def iter_pages(base_url: str = _BASE_URL, max_in_flight: int = 1, first_page: int = 1) -> Iterator[List[Dict[str, Any]]]:
+    """Yield pages first_page, first_page + 1... in order until the first empty one.
 
-    @dlt.resource(write_disposition="replace")
-    def taxi_rows() -> Iterator[Dict[str, Any]]:
-        page = 1
+    Keeps up to max_in_flight requests outstanding. Each worker thread reuses
+    one requests.Session, so a connection is opened per thread rather than
+    per page.
+    """
+    local = threading.local()
+    sessions = []
+
+    def fetch(page):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+            sessions.append(local.session)
+        return fetch_page(local.session, base_url, page)
+
+    pending = deque()
+    next_page = first_page
+    pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="taxi-page")
+    try:
         while True:
-            url = _BASE_URL + "?" + urlencode({"page": page})
-            with urllib.request.urlopen(url, timeout=30) as resp:
-                data = json.loads(resp.read().decode("utf-8"))
+            while len(pending) < max_in_flight:
+                pending.append(pool.submit(fetch, next_page))
+                next_page += 1
+            data = pending.popleft().result()
             if not data:
                 break
-            yield from data
-            page += 1
+            yield data
+    finally:
+        # Requests past the end that have not started yet are dropped
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
+        for session in sessions:
+            session.close()
+
+
+def page_to_arrow(page: List[Dict[str, Any]]) -> pa.Table:
+    """One API page as an Arrow table with dlt's column names and typed timestamps."""
+    table = pa.Table.from_pylist(page)
+    table = table.rename_columns([_naming.normalize_identifier(name) for name in table.column_names])
+    columns = []
+    for name, column in zip(table.column_names, table.columns):
+        target = _COLUMN_TYPES.get(name)
+        if target == _TIMESTAMP_TYPE and pa.types.is_string(column.type):
+            column = pc.strptime(column, format="%Y-%m-%d %H:%M:%S", unit="us")
+        if target is not None:
+            column = column.cast(target)
+        columns.append(column)
+    return pa.Table.from_arrays(columns, names=table.column_names)
+
 
-    return taxi_rows
+@dlt.source
+def taxi_source(page_size: int = 1000, base_url: str = _BASE_URL, max_in_flight: int = 1,
+                incremental: bool = False):
+    """DLT source that yields taxi rows from the paginated REST API."""
+
+    def taxi_rows() -> Iterator[pa.Table]:
+        state = dlt.current.resource_state() if incremental else {}
+        page_number = first_page = state.get("last_page", 1)
+        for page in iter_pages(base_url, max_in_flight, first_page):
+            yield page_to_arrow(page)
+            state["last_page"] = page_number
+            page_number += 1
+
+    resource = dlt.resource(taxi_rows, name="taxi_rows", write_disposition="replace")
+    if incremental:
+        resource.apply_hints(
+            write_disposition="merge",
+            primary_key=TRIP_KEY,
+            incremental=dlt.sources.incremental("trip_pickup_date_time"),
+        )
+    return resource
 
 
 taxi_pipeline = dlt.pipeline(
@@ -41,5 +142,14 @@ taxi_pipeline = dlt.pipeline(
 )
 
 if __name__ == "__main__":
-    info = taxi_pipeline.run(taxi_source())
+    parser = argparse.ArgumentParser(description="Load the taxi API into DuckDB")
+    parser.add_argument("--max-in-flight", type=int, default=1,
+                        help="Page requests kept in flight at once (1 = one page after another)")
+    parser.add_argument("--base-url", default=_BASE_URL)
+    parser.add_argument("--incremental", action="store_true",
+                        help="Merge new trips instead of replacing the table")
+    args = parser.parse_args()
+
+    info = taxi_pipeline.run(taxi_source(base_url=args.base_url, max_in_flight=args.max_in_flight,
+                                         incremental=args.incremental))
     print(info)